@@ -0,0 +1,88 @@
+"""
+Compares a_star with the blockers heuristic against bidirectional_search on deep puzzles, where
+the forward search has to go through most of the reachable states. The puzzles are the states
+farthest from the goal on random boards that could be explored completely.
+
+usage: python -m benchmarks.bench_bidirectional [--seed 1] [--puzzles 8] [--min-depth 15]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_search import solution_length
+from benchmarks.generate import depths_to_goal, random_cars
+from structure.bidirectional import bidirectional_search
+from structure.gamestate import GameState
+from structure.search import a_star
+from structure.stats import SearchStats
+
+# (board size, car count) pairs the random boards are drawn from
+BOARDS = [(6, 12), (6, 14), (7, 10), (7, 14)]
+
+# random boards tried before giving up on finding enough deep puzzles
+ATTEMPTS = 400
+
+
+def deep_puzzles(seed, count, min_depth):
+    """returns up to count puzzles at least min_depth moves from the goal, with their depth."""
+    rnd = random.Random(seed)
+    puzzles = []
+
+    for attempt in range(ATTEMPTS):
+        if len(puzzles) == count:
+            break
+
+        size, num_cars = rnd.choice(BOARDS)
+        initial_state = GameState(random_cars(rnd, size, size, num_cars), size, size)
+        depths, exact = depths_to_goal(initial_state)
+        if not depths or not exact:
+            continue
+
+        depth = max(depths.values())
+        if depth < min_depth:
+            continue
+
+        positions = rnd.choice(sorted(positions for positions, value in depths.items() if value == depth))
+        puzzles.append((GameState.from_layout(initial_state.layout, positions), depth))
+
+    return puzzles
+
+
+def timed(search, state):
+    """runs a search and returns its solution length, expansions and wall time."""
+    stats = SearchStats()
+    start = time.perf_counter()
+    sol = search(state, stats)
+    return solution_length(sol), stats.expanded, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the bidirectional search on deep puzzles.")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--puzzles', type=int, default=8)
+    parser.add_argument('--min-depth', type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'board':>8} {'depth':>6} {'a_star exp':>11} {'time (s)':>9} {'bidir exp':>10} {'time (s)':>9}")
+
+    totals = [0.0, 0.0]
+    for state, depth in deep_puzzles(args.seed, args.puzzles, args.min_depth):
+        forward_moves, forward_expanded, forward_time = timed(
+            lambda state, stats: a_star(state, heuristic='blockers', stats=stats), state)
+        bidir_moves, bidir_expanded, bidir_time = timed(
+            lambda state, stats: bidirectional_search(state, stats=stats), state)
+
+        board = f"{state.num_rows}x{state.num_cols}/{len(state.cars)}"
+        print(f"{board:>8} {depth:>6} {forward_expanded:>11} {forward_time:>9.3f} {bidir_expanded:>10} {bidir_time:>9.3f}")
+
+        if not forward_moves == bidir_moves == depth:
+            print(f"  solution lengths differ: a_star {forward_moves}, bidirectional {bidir_moves}, expected {depth}")
+
+        totals[0] += forward_time
+        totals[1] += bidir_time
+
+    print(f"total time: a_star {totals[0]:.3f}s, bidirectional {totals[1]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
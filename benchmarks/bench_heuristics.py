@@ -0,0 +1,32 @@
+"""
+Reports expansions, wall time and solution lengths of a_star with every registered heuristic.
+
+usage: python -m benchmarks.bench_heuristics < benchmarks/puzzles.txt
+"""
+import time
+
+from benchmarks.bench_search import solution_length
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.heuristics import HEURISTICS
+from structure.search import a_star
+from structure.stats import SearchStats
+
+
+def main():
+    puzzles = [GameState(cars, rows, columns) for cars, rows, columns in get_data()]
+
+    print(f"{'heuristic':>22} {'expansions':>12} {'time (s)':>10} {'total moves':>12}")
+
+    for name in HEURISTICS:
+        stats = SearchStats()
+        start = time.perf_counter()
+        lengths = [solution_length(a_star(state, heuristic=name, stats=stats)) for state in puzzles]
+        elapsed = time.perf_counter() - start
+
+        total_moves = sum(length for length in lengths if length is not None)
+        print(f"{name:>22} {stats.expanded:>12} {elapsed:>10.3f} {total_moves:>12}")
+
+
+if __name__ == "__main__":
+    main()
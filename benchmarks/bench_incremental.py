@@ -0,0 +1,51 @@
+"""
+Compares solving edited puzzles from scratch with a_star against re-solving them with the
+IncrementalSolver. Every puzzle is solved once, then edited by sliding each car that can move
+from the initial position, one edit after the other.
+
+usage: python -m benchmarks.bench_incremental < benchmarks/puzzles.txt
+"""
+import time
+
+from benchmarks.bench_search import solution_length
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.incremental import IncrementalSolver
+from structure.search import a_star, successor_states
+
+
+def main():
+    fresh_time = incremental_time = 0.0
+    edits = 0
+
+    for cars, rows, columns in get_data():
+        state = GameState(cars, rows, columns)
+        solver = IncrementalSolver()
+        solver.solve(state)
+
+        for moved in successor_states(state):
+            car_idx = next(car_idx for car_idx, (old, new) in enumerate(zip(state.positions, moved.positions))
+                           if old != new)
+            car = moved.cars[car_idx]
+
+            start = time.perf_counter()
+            new_state, sol = solver.move_car(state, car_idx, car.row, car.col)
+            incremental_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = a_star(new_state, heuristic='blockers')
+            fresh_time += time.perf_counter() - start
+
+            if solution_length(sol) != solution_length(expected):
+                print(f"edit {edits}: {solution_length(sol)} moves instead of {solution_length(expected)}")
+
+            state = new_state
+            edits += 1
+
+    print(f"edits:        {edits}")
+    print(f"from scratch: {fresh_time:.3f}s")
+    print(f"incremental:  {incremental_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
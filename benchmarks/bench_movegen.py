@@ -0,0 +1,349 @@
+"""
+Compares successor generation speed of the BitBoard backend with the per-car scan that GameState
+used before it. The scan is kept here as it was, as the reference.
+
+usage: python -m benchmarks.bench_movegen < benchmarks/puzzles.txt
+"""
+import time
+from collections import deque
+
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.node import Node
+
+# number of states expanded per puzzle
+SAMPLE_SIZE = 2000
+
+
+def max_up(state, car):
+    """
+    This function calculates the maximum number of spaces the given car can move upwards.
+    """
+
+    # car is on the first row
+    if car.row == 0:
+        return 0
+
+    free_spaces = set()
+
+    for other_car in state.cars:
+        if other_car == car:
+            # skip the car itself
+            continue
+
+        if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
+            # other_car is in the way at some point; could be above or below the car
+            if other_car.row < car.row:
+                # other_car is above the car
+                free_spaces.add(car.row - (other_car.row + 1))
+
+        elif other_car.orientation == 'v' and other_car.col == car.col:
+            # other_car is in the way at some point; could be over or under the car
+            if other_car.row + other_car.length < car.row:
+                # other_car is above the car
+                free_spaces.add(car.row - (other_car.row + other_car.length))
+
+    if free_spaces:
+        moves = min(free_spaces)
+        return moves
+
+    else:
+        # if no cars are blocking the way, the car can move up to the first row
+        return car.row
+
+
+def max_down(state, car):
+    """This function calculates the maximum number of spaces the given car can move downwards."""
+
+    if car.row + car.length == state.num_rows:
+        # the car is at the bottom of the grid
+        return 0
+
+    free_spaces = set()
+    for other_car in state.cars:
+        if other_car == car:
+            # skip the car itself
+            continue
+
+        if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
+            # other_car is in the way at some point; could be above or below the car
+            if other_car.row >= car.row + car.length:
+                # other_car is below the car
+                free_spaces.add((other_car.row - (car.row + car.length)))
+
+        elif other_car.orientation == 'v' and other_car.col == car.col:
+            if other_car.row > car.row:
+                # other_car is below the car
+                free_spaces.add((other_car.row - (car.row + car.length)))
+
+    if free_spaces:
+        moves = min(free_spaces)
+
+    else:
+        # if no cars are blocking the way, the car can move down to the last row
+        moves = state.num_rows - (car.row + car.length)
+
+    return moves
+
+
+def max_right(state, car):
+    """
+    This function calculates the maximum number of spaces the given car can move to the right.
+    """
+
+    if car.col + car.length == state.num_cols:
+        # car is at the far right of the grid
+        return 0
+
+    free_spaces = set()
+    car_front = car.col + car.length
+
+    for other_car in state.cars:
+        if other_car == car:
+            # skip the car itself
+            continue
+
+        if other_car.orientation == 'h' and other_car.row == car.row:
+            # both cars are on the same row
+            if car_front <= other_car.col:
+                # other_car is to the right of the car
+                free_spaces.add(other_car.col - car_front)
+
+        elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
+            # other_car is in the way of car at some point
+            if other_car.col >= car_front:
+                # other_car is to the right of the car
+                free_spaces.add(other_car.col - car_front)
+
+    if free_spaces:
+        moves = min(free_spaces)
+        return moves
+
+    else:
+        # if no cars are blocking, the car can move right to the last column
+        moves = state.num_cols - car_front
+
+    return moves
+
+
+def max_left(state, car):
+    """
+    This function calculates the maximum number of spaces the given car can move to the left.
+    """
+
+    if car.col == 0:
+        # car is at the far left of the grid
+        return 0
+
+    free_spaces = set()
+
+    for other_car in state.cars:
+        if other_car == car:
+            # skip the car itself
+            continue
+
+        if other_car.orientation == 'h' and other_car.row == car.row:
+            # other_car is on the same row as the car
+            if other_car.col + other_car.length <= car.col:
+                # other_car is to the left of the car
+                free_spaces.add(car.col - (other_car.col + other_car.length))
+
+        elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
+            # other_car is on the same row as the car
+            if other_car.col + 1 <= car.col:
+                # other_car is to the left of the car
+                free_spaces.add(car.col - (other_car.col + 1))
+
+    if free_spaces:
+        moves = min(free_spaces)
+        return moves
+
+    else:
+        # if no cars are blocking the way, the car can move left to the first column
+        return car.col
+
+
+def blocked_directions(state, car):
+    """
+    returns a list of blocked directions.
+    """
+
+    blocked_directions = set()
+
+    if car.orientation == 'h':
+        # the car is horizontal -> possible directions are :l(left) and r(right)
+        if car.col == 0:
+            # car is at the far left of the grid
+            blocked_directions.add('l')
+
+        if car.front() == state.num_cols-1:
+            # car is at the far right of the grid
+            blocked_directions.add('r')
+
+        for other_car in state.cars:
+            if other_car == car:
+                # skip the car itself
+                continue
+
+            if 'l' in blocked_directions and 'r' in blocked_directions:
+                # if both directions are already blocked, no need to check further
+                break
+
+            if other_car.orientation == 'h' and car.row == other_car.row:
+                # both cars are on the same row
+                if car.col == other_car.front():
+                    # the left side of car is overlapping with the right side of other_car
+                    blocked_directions.add('l')
+
+                elif car.front() == other_car.col:
+                    # the car's front is overlapping with the start of other_car
+                    blocked_directions.add('r')
+
+            elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
+                # other car is in the way at some point
+                if car.col == other_car.col + 1:
+                    # the start of the car is overlapping with the right side of other_car
+                    blocked_directions.add('l')
+
+                elif car.front() == other_car.col:
+                    # the car's front is overlapping with the left side of other_car
+                    blocked_directions.add('r')
+
+    elif car.orientation == 'v':
+
+        if car.row == 0:
+            # the car is on the first row
+            blocked_directions.add('u')
+
+        if car.front() == state.num_rows-1:
+            # the car is at the bottom of the grid
+            blocked_directions.add('d')
+
+        # the car is vertical -> possible directions are :u(up) and d(down)
+        for other_car in state.cars:
+
+            if other_car == car:
+                # skip the car itself
+                continue
+
+            if 'u' in blocked_directions and 'd' in blocked_directions:
+                # if both directions are already blocked, no need to check further
+                break
+
+            if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
+                # other_car is in the way of the car at some point
+                if car.row == other_car.row + 1:
+                    # the top of the car is overlapping with the bottom of other_car
+                    blocked_directions.add('u')
+
+                elif car.front() == other_car.row:
+                    # the bottom of the car is overlapping with the top of other_car
+                    blocked_directions.add('d')
+
+            if other_car.orientation == 'v' and car.col == other_car.col:
+                # other_car is  in the way of the car at some point
+                if car.row == other_car.front():
+                    # the top of the car is overlapping with the bottom of other_car
+                    blocked_directions.add('u')
+
+                elif car.front() == other_car.row:
+                    # bottom of the car is overlapping with the top of other_car
+                    blocked_directions.add('d')
+
+    return blocked_directions
+
+
+def interval(start, length):
+    """
+    returns a set of integers representing the range from start to start + length - 1.
+    """
+    return set(range(start, start + length))
+
+
+def scan_successors(state):
+    """the per-car scan successor generation, as done before the BitBoard backend."""
+    successors = []
+
+    for car in state.cars:
+        blocked_dirs = blocked_directions(state, car)
+
+        if car.orientation == 'v':
+            if 'u' not in blocked_dirs:
+                moves = max_up(state, car)
+                if moves > 0:
+                    successors.append(state.go_up(car, moves))
+
+            if 'd' not in blocked_dirs:
+                moves = max_down(state, car)
+                if moves > 0:
+                    successors.append(state.go_down(car, moves))
+
+        elif car.orientation == 'h':
+            if 'l' not in blocked_dirs:
+                moves = max_left(state, car)
+                if moves > 0:
+                    successors.append(state.go_left(car, moves))
+
+            if 'r' not in blocked_dirs:
+                moves = max_right(state, car)
+                if moves > 0:
+                    successors.append(state.go_right(car, moves))
+
+    return successors
+
+
+def sample_states(initial_state):
+    """collects up to SAMPLE_SIZE reachable states in breadth-first order."""
+    states = [initial_state]
+    seen = {initial_state}
+    queue = deque(states)
+
+    while queue and len(states) < SAMPLE_SIZE:
+        for successor in Node(queue.popleft(), 0).generate_successor():
+            if successor.state not in seen:
+                seen.add(successor.state)
+                states.append(successor.state)
+                queue.append(successor.state)
+
+    return states[:SAMPLE_SIZE]
+
+
+def timed(expand, states):
+    start = time.perf_counter()
+    for state in states:
+        expand(state)
+    return time.perf_counter() - start
+
+
+def main():
+    total_states = 0
+    total_scan = 0.0
+    total_bitboard = 0.0
+
+    print(f"{'test':>6} {'states':>8} {'scan nodes/s':>14} {'bitboard nodes/s':>18} {'speedup':>8}")
+
+    for i, (cars, rows, columns) in enumerate(get_data()):
+        states = sample_states(GameState(cars, rows, columns))
+
+        # both backends must agree on the successors of every state
+        for state in states:
+            expected = scan_successors(state)
+            actual = [successor.state for successor in Node(state, 0).generate_successor()]
+            assert expected == actual, f"successors differ on test #{i + 1}"
+
+        scan_time = timed(scan_successors, states)
+        bitboard_time = timed(lambda state: Node(state, 0).generate_successor(), states)
+
+        total_states += len(states)
+        total_scan += scan_time
+        total_bitboard += bitboard_time
+
+        print(f"{i + 1:>6} {len(states):>8} {len(states) / scan_time:>14.0f} "
+              f"{len(states) / bitboard_time:>18.0f} {scan_time / bitboard_time:>7.2f}x")
+
+    print(f"{'total':>6} {total_states:>8} {total_states / total_scan:>14.0f} "
+          f"{total_states / total_bitboard:>18.0f} {total_scan / total_bitboard:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
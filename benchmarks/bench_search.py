@@ -0,0 +1,39 @@
+"""
+Reports expansions and wall time of a_star with every open list on the same puzzles.
+
+usage: python -m benchmarks.bench_search < benchmarks/puzzles.txt
+"""
+import time
+
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.open_list import OPEN_LISTS
+from structure.search import a_star
+from structure.stats import SearchStats
+
+
+def solution_length(sol):
+    return sum(1 for move in sol[1] if move) if sol else None
+
+
+def main():
+    puzzles = [GameState(cars, rows, columns) for cars, rows, columns in get_data()]
+
+    print(f"{'open list':>10} {'expansions':>12} {'time (s)':>10}")
+
+    lengths = {}
+    for name in OPEN_LISTS:
+        stats = SearchStats()
+        start = time.perf_counter()
+        lengths[name] = [solution_length(a_star(state, open_list=name, stats=stats)) for state in puzzles]
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:>10} {stats.expanded:>12} {elapsed:>10.3f}")
+
+    for name, found in lengths.items():
+        if found != lengths['heap']:
+            print(f"warning: '{name}' found different solution lengths than 'heap'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Generates a reproducible corpus of solvable puzzles in the input format of get_data, together with
+their optimal move counts.
+
+For every board size and car count, random boards are explored breadth first; the exact distance
+to the goal of every explored state is then computed backwards, and states are picked so that the
+corpus covers every depth range.
+
+usage: python -m benchmarks.generate [--seed 1] [--corpus benchmarks/corpus.txt] [--baseline benchmarks/baseline.json]
+"""
+import argparse
+import json
+import random
+from collections import deque
+
+from structure.batch import solution_moves
+from structure.bitboard import slides
+from structure.car import Car
+from structure.gamestate import GameState
+from structure.search import a_star
+
+BOARD_SIZES = [(6, 6), (7, 7), (8, 8)]
+CAR_COUNTS = [6, 9, 12]
+
+# ranges of optimal move counts, (lowest, highest) inclusive
+DEPTHS = [(1, 3), (4, 7), (8, 12), (13, 99)]
+
+# puzzles per board size, car count and depth range
+PER_BUCKET = 1
+
+# random boards tried per board size and car count
+ATTEMPTS = 40
+
+# states explored on one random board
+MAX_STATES = 20000
+
+
+def random_cars(rnd, num_rows, num_cols, num_cars):
+    """places the horizontal red car and up to num_cars - 1 other cars at random, without overlaps."""
+    length = 2
+    red_row = rnd.randrange(num_rows)
+    cars = [Car(red_row, rnd.randrange(num_cols - length - 1), 'h', length)]
+    occupied = {(red_row, cars[0].col + k) for k in range(length)}
+
+    for attempt in range(num_cars * 50):
+        if len(cars) == num_cars:
+            break
+
+        orientation = rnd.choice('hv')
+        length = rnd.choice([2, 2, 3])
+
+        if orientation == 'h':
+            row, col = rnd.randrange(num_rows), rnd.randrange(num_cols - length + 1)
+            cells = {(row, col + k) for k in range(length)}
+        else:
+            row, col = rnd.randrange(num_rows - length + 1), rnd.randrange(num_cols)
+            cells = {(row + k, col) for k in range(length)}
+
+        # a horizontal car in front of the red car would make the puzzle unsolvable
+        if orientation == 'h' and row == red_row:
+            continue
+
+        if not cells & occupied:
+            occupied |= cells
+            cars.append(Car(row, col, orientation, length))
+
+    return cars
+
+
+def depths_to_goal(initial_state):
+    """
+    explores up to MAX_STATES states from the given one and returns the distance to the goal of every
+    explored state that can reach a goal within the explored part, and whether every reachable state
+    was explored. Only then are the distances exact; otherwise they are upper bounds.
+    """
+    layout = initial_state.layout
+    predecessors = {initial_state.positions: []}
+    queue = deque([initial_state.positions])
+    goals = []
+
+    while queue and len(predecessors) < MAX_STATES:
+        positions = queue.popleft()
+
+        if GameState.from_layout(layout, positions, 0).is_goal():
+            goals.append(positions)
+            continue
+
+        for car_idx, distance in slides(layout, positions):
+            successor = positions[:car_idx] + (positions[car_idx] + distance,) + positions[car_idx + 1:]
+            if successor not in predecessors:
+                predecessors[successor] = []
+                queue.append(successor)
+            predecessors[successor].append(positions)
+
+    depths = {positions: 0 for positions in goals}
+    queue = deque(goals)
+
+    while queue:
+        positions = queue.popleft()
+        for predecessor in predecessors[positions]:
+            if predecessor not in depths:
+                depths[predecessor] = depths[positions] + 1
+                queue.append(predecessor)
+
+    return depths, len(predecessors) < MAX_STATES
+
+
+def generate(seed):
+    """returns a list of (num_rows, num_cols, cars, optimal move count) tuples."""
+    rnd = random.Random(seed)
+    puzzles = []
+
+    for num_rows, num_cols in BOARD_SIZES:
+        for num_cars in CAR_COUNTS:
+            found = {depth_range: 0 for depth_range in DEPTHS}
+
+            for attempt in range(ATTEMPTS):
+                if all(count == PER_BUCKET for count in found.values()):
+                    break
+
+                initial_state = GameState(random_cars(rnd, num_rows, num_cols, num_cars), num_rows, num_cols)
+                depths, exact = depths_to_goal(initial_state)
+
+                for depth_range in DEPTHS:
+                    if found[depth_range] == PER_BUCKET:
+                        continue
+
+                    low, high = depth_range
+                    candidates = sorted(positions for positions, depth in depths.items() if low <= depth <= high)
+                    if not candidates:
+                        continue
+
+                    state = GameState.from_layout(initial_state.layout, rnd.choice(candidates))
+                    depth = depths[state.positions]
+
+                    if not exact:
+                        # the explored part may miss a shorter way, search it with an admissible heuristic
+                        depth = len(solution_moves(a_star(state, heuristic='blockers_of_blockers')))
+                        if not low <= depth <= high:
+                            continue
+
+                    puzzles.append((num_rows, num_cols, state.cars, depth))
+                    found[depth_range] += 1
+
+    return puzzles
+
+
+def write_corpus(puzzles, path):
+    with open(path, 'w') as f:
+        f.write(f"{len(puzzles)}\n")
+        for num_rows, num_cols, cars, depth in puzzles:
+            f.write(f"{num_rows} {num_cols} {len(cars)}\n")
+            for car in cars:
+                f.write(f"{car.row + 1} {car.col + 1} {car.orientation} {car.length}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a reproducible benchmark corpus.")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--corpus', default='benchmarks/corpus.txt')
+    parser.add_argument('--baseline', default='benchmarks/baseline.json')
+    args = parser.parse_args()
+
+    puzzles = generate(args.seed)
+    write_corpus(puzzles, args.corpus)
+
+    with open(args.baseline, 'w') as f:
+        json.dump({'seed': args.seed, 'moves': [depth for *puzzle, depth in puzzles]}, f, indent=1)
+        f.write('\n')
+
+    print(f"wrote {len(puzzles)} puzzles to {args.corpus} and their optimal move counts to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
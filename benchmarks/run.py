@@ -0,0 +1,109 @@
+"""
+Runs the solver over a benchmark corpus and reports throughput, per-puzzle latency percentiles,
+expansions and peak memory. The move counts are checked against the stored optimal baseline.
+
+Options that are not listed below are passed on to main.py, so any solver can be measured.
+Solutions that are not known to be optimal (Unproven), like those of the default 'blocking'
+heuristic of a_star or of ara_star stopped by --deadline, are not compared with the baseline; use
+an admissible heuristic, e.g. --heuristic blockers, to check optimality. Puzzles that run out of
+time are reported as timeouts.
+
+usage: python -m benchmarks.run [--corpus benchmarks/corpus.txt] [--baseline benchmarks/baseline.json]
+                                [--update-baseline] [main.py options]
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+
+from main import parse_args, solve
+from structure.batch import TIMED_OUT, Unproven, solution_moves
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.stats import SearchStats
+
+
+def percentile(values, fraction):
+    """nearest rank percentile of a sorted list."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the solver on a corpus.")
+    parser.add_argument('--corpus', default='benchmarks/corpus.txt')
+    parser.add_argument('--baseline', default='benchmarks/baseline.json')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store the move counts of this run as the new baseline")
+    args, solver_argv = parser.parse_known_args()
+    solver_args = parse_args(solver_argv)
+
+    latencies = []
+    found = []
+    timed_out = set()
+    unproven = set()
+    stats = SearchStats()
+
+    start = time.perf_counter()
+    for i, (cars, rows, columns) in enumerate(get_data(args.corpus)):
+        puzzle_start = time.perf_counter()
+        moves = solution_moves(solve(GameState(cars, rows, columns), solver_args, stats))
+        latencies.append(time.perf_counter() - puzzle_start)
+
+        if moves == TIMED_OUT:
+            timed_out.add(i)
+            found.append(None)
+            continue
+
+        if isinstance(moves, Unproven):
+            unproven.add(i)
+        found.append(None if moves is None else len(moves))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"puzzles:     {len(latencies)}")
+    print(f"throughput:  {len(latencies) / elapsed:.2f} puzzles/s")
+    print(f"latency:     p50={percentile(latencies, 0.5) * 1000:.1f}ms p90={percentile(latencies, 0.9) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+    print(f"expansions:  {stats.expanded} ({stats.generated} generated)")
+    # ru_maxrss is in kilobytes on linux
+    print(f"peak rss:    {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+    if timed_out:
+        print(f"timeouts:    {len(timed_out)}")
+
+    if args.update_baseline:
+        if timed_out or unproven:
+            parser.error("the baseline can only be updated from optimal solutions of every puzzle")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline['moves'] = found
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=1)
+            f.write('\n')
+        print(f"baseline:    updated {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        expected = json.load(f)['moves']
+
+    for i in sorted(timed_out):
+        print(f"Test #{i + 1}: timed out")
+
+    unchecked = timed_out | unproven
+    mismatches = [(i, want, got) for i, (want, got) in enumerate(zip(expected, found))
+                  if i not in unchecked and want != got]
+    for i, want, got in mismatches:
+        print(f"Test #{i + 1}: expected {want} moves, got {got}")
+
+    checked = len(expected) - len(unchecked)
+    print(f"baseline:    {checked - len(mismatches)}/{checked} move counts unchanged")
+    if unproven:
+        print(f"unproven:    {len(unproven)} solutions not compared with the baseline")
+
+    if mismatches or len(expected) != len(found):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
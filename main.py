@@ -1,29 +1,248 @@
+import argparse
+import json
+import sys
+import time
+from functools import partial
+
+from structure.batch import TIMED_OUT, Unproven, solution_moves, solve_batch, store
+from structure.bidirectional import bidirectional_search
+from structure.cache import MAX_BYTES, MISSING, SolutionCache
+from structure.closed_set import CLOSED_SETS
+from structure.external import RUN_SIZE, external_bfs
 from structure.gamestate import GameState
 from structure.get_inp import get_data
-from structure.search import a_star
-
-
-def main():
-    parking_areas = get_data()
-
-    for i, (cars, rows, columns) in enumerate(parking_areas):
-        initial_state = GameState(cars, rows, columns)
-
-        print(f"Test #{i + 1}: ", end="")
-        sol = a_star(initial_state)
-        if sol:
-            solution_path, moves = sol
-            moves_num = 0
-            for state, move in zip(solution_path, moves):
-                if move:
-                    moves_num += 1
-                    # uncomment these lines if you want to see the moves taken at each state
-                    # print(move)
-
-            print(moves_num)
-            # print("".join(["-"] * 50))
-        else:
-            print("No solution found.")
+from structure.heuristics import ADMISSIBLE, HEURISTICS
+from structure.open_list import OPEN_LISTS
+from structure.parallel import hda_star
+from structure.pattern_db import PatternDatabase
+from structure.precheck import unsolvable
+from structure.search import TABLE_SIZE, WEIGHT, a_star, ara_star, ida_star
+from structure.server import SolverServer
+from structure.stats import SearchStats
+
+# pattern databases loaded in this process, by file; each worker process maps the files once
+PATTERN_DBS = {}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solves the Rush Hour puzzles read from the standard input.")
+    parser.add_argument('--input', help="read the tests from this file instead of the standard input")
+    parser.add_argument('--search', choices=['a_star', 'ida_star', 'layered_bfs', 'hda_star', 'ara_star',
+                                             'external_bfs', 'bidirectional'],
+                        default='a_star',
+                        help="search algorithm; ida_star keeps memory bounded on large boards, "
+                             "layered_bfs expands whole layers with numpy, "
+                             "hda_star spreads a single test over several processes, "
+                             "ara_star returns the best solution found by --deadline, "
+                             "external_bfs keeps its states on disk, "
+                             "bidirectional also searches backward from the goal configurations")
+    parser.add_argument('--heuristic', choices=list(HEURISTICS),
+                        help="heuristic of the search (default: 'blocking' for a_star, 'blockers' otherwise)")
+    parser.add_argument('--open-list', choices=list(OPEN_LISTS), default='heap',
+                        help="open list of a_star")
+    parser.add_argument('--closed-set', choices=list(CLOSED_SETS), default='dict',
+                        help="how a_star keeps the visited states; packed takes far less memory")
+    parser.add_argument('--pattern-db', action='append', default=[], metavar='FILE',
+                        help="database built by 'python -m structure.pattern_db build'; a_star reads the "
+                             "solutions of the layout it covers from it; may be given several times")
+    parser.add_argument('--table-size', type=int, default=TABLE_SIZE,
+                        help="maximum number of states in the transposition table of ida_star")
+    parser.add_argument('--deadline', type=float,
+                        help="seconds ara_star may spend on a test (default: until the solution is optimal)")
+    parser.add_argument('--weight', type=float, default=WEIGHT,
+                        help="weight of the heuristic in the first search of ara_star")
+    parser.add_argument('--work-dir', help="directory of the temporary files of external_bfs")
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE,
+                        help="states external_bfs sorts in memory before writing them out")
+    parser.add_argument('--search-workers', type=int,
+                        help="processes of hda_star (default: the number of CPUs)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="solve the tests on this many worker processes (default: in this process)")
+    parser.add_argument('--timeout', type=float,
+                        help="seconds a single test may take with --workers before it is given up")
+    parser.add_argument('--max-tasks-per-child', type=int,
+                        help="tests a worker solves before it is replaced by a fresh process")
+    parser.add_argument('--cache', help="sqlite file keeping the solutions across runs")
+    parser.add_argument('--cache-size', type=int, default=MAX_BYTES // (1024 * 1024),
+                        help="size limit of the solution cache in MiB")
+    parser.add_argument('--serve', action='store_true',
+                        help="keep running and answer puzzles over http instead of reading the tests")
+    parser.add_argument('--host', default='127.0.0.1', help="address the server listens on")
+    parser.add_argument('--port', type=int, default=8765, help="port the server listens on")
+    parser.add_argument('--socket', help="unix socket the server listens on instead of a tcp port")
+    parser.add_argument('--stats', choices=['text', 'json'],
+                        help="print search statistics of every test to the standard error, as text or json lines")
+
+    args = parser.parse_args(argv)
+    if args.stats and (args.workers or args.serve):
+        parser.error("--stats can not be combined with --workers or --serve")
+    if args.search == 'hda_star' and (args.workers or args.serve):
+        parser.error("--search hda_star can not be combined with --workers or --serve")
+    return args
+
+
+def solve(initial_state, args, stats=None):
+    """solves a puzzle with the search of the arguments; its solution is Unproven unless that search is exact."""
+    sol = search(initial_state, args, stats)
+
+    if sol and sol != TIMED_OUT and not exact(initial_state, args):
+        return Unproven(sol)
+    return sol
+
+
+def exact(initial_state, args):
+    """whether the search of the arguments only finds optimal solutions for the given puzzle."""
+    if args.search in ('layered_bfs', 'external_bfs', 'bidirectional'):
+        return True
+
+    if args.search == 'a_star' and pattern_db_for(initial_state, args.pattern_db) is not None:
+        return True
+
+    return heuristic_name(args) in ADMISSIBLE
+
+
+def heuristic_name(args):
+    """the heuristic chosen with --heuristic, or the default one of the search."""
+    return args.heuristic or ('blocking' if args.search == 'a_star' else 'blockers')
+
+
+def solver_config(args):
+    """
+    names the search and the options that decide its solutions, as the cache config of solutions that
+    are not known to be optimal. None for ara_star with a deadline, whose solutions depend on timing.
+    """
+    if args.search == 'ara_star' and args.deadline is not None:
+        return None
+
+    options = {'search': args.search, 'heuristic': heuristic_name(args), 'weight': args.weight,
+               'open_list': args.open_list, 'closed_set': args.closed_set, 'table_size': args.table_size}
+    return json.dumps(options, sort_keys=True)
+
+
+def pattern_db_for(state, paths):
+    """returns the pattern database of the given files that covers the layout of the state, or None."""
+    for path in paths:
+        db = PATTERN_DBS.get(path)
+        if db is None:
+            db = PATTERN_DBS[path] = PatternDatabase.load(path)
+
+        if db.covers(state):
+            return db
+
+    return None
+
+
+def search(initial_state, args, stats=None):
+    # some unsolvable puzzles can be told apart without searching their whole state space
+    if unsolvable(initial_state) is not None:
+        return None
+
+    if args.search == 'layered_bfs':
+        # numpy is only needed for this search
+        from structure.frontier import layered_bfs
+        return layered_bfs(initial_state)
+
+    if args.search == 'hda_star':
+        return hda_star(initial_state, workers=args.search_workers, heuristic=heuristic_name(args))
+
+    if args.search == 'bidirectional':
+        return bidirectional_search(initial_state, stats=stats)
+
+    if args.search == 'external_bfs':
+        return external_bfs(initial_state, args.work_dir, args.run_size, stats)
+
+    if args.search == 'ara_star':
+        deadline = None if args.deadline is None else time.perf_counter() + args.deadline
+        sol, factor = ara_star(initial_state, deadline, heuristic=heuristic_name(args),
+                               weight=args.weight, on_solution=report_solution, stats=stats)
+        if sol is None and deadline is not None and time.perf_counter() >= deadline:
+            return TIMED_OUT
+        if sol is not None and factor > 1:
+            # stopped at the deadline before the solution was proven optimal
+            return Unproven(sol)
+        return sol
+
+    if args.search == 'ida_star':
+        return ida_star(initial_state, heuristic=heuristic_name(args), table_size=args.table_size,
+                        stats=stats)
+
+    return a_star(initial_state, open_list=args.open_list, pattern_db=pattern_db_for(initial_state, args.pattern_db),
+                  heuristic=heuristic_name(args), stats=stats, closed_set=args.closed_set)
+
+
+def report_solution(sol, factor):
+    print(f"ara_star: {len(sol[1]) - 1} moves, at most {factor:.2f} times the optimal", file=sys.stderr, flush=True)
+
+
+def print_result(i, moves):
+    print(f"Test #{i + 1}: ", end="")
+
+    if moves == TIMED_OUT:
+        print("Timed out.", flush=True)
+    elif moves is None:
+        print("No solution found.", flush=True)
+    else:
+        print(len(moves), flush=True)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # load the pattern databases up front, so a bad file is reported before any test is solved
+    for path in args.pattern_db:
+        PATTERN_DBS[path] = PatternDatabase.load(path)
+
+    if args.serve:
+        # without a cache file the solutions are still kept for the life of the server
+        cache = SolutionCache(args.cache or ':memory:', args.cache_size * 1024 * 1024, solver_config(args))
+        server = SolverServer(partial(solve, args=args), args.workers or None, args.timeout,
+                              args.max_tasks_per_child, cache)
+        server.serve(args.host, args.port, args.socket)
+        cache.close()
+        return
+
+    parking_areas = get_data(args.input)
+    cache = SolutionCache(args.cache, args.cache_size * 1024 * 1024, solver_config(args)) if args.cache else None
+
+    if args.workers:
+        results = solve_batch(parking_areas, partial(solve, args=args), args.workers,
+                              args.timeout, args.max_tasks_per_child, cache)
+
+        for i, moves in enumerate(results):
+            print_result(i, moves)
+
+    else:
+        for i, (cars, rows, columns) in enumerate(parking_areas):
+            initial_state = GameState(cars, rows, columns)
+
+            moves = cache.get(initial_state, MISSING) if cache is not None else MISSING
+            stats = None
+            if moves is MISSING:
+                stats = SearchStats() if args.stats else None
+                start = time.perf_counter()
+                sol = solve(initial_state, args, stats)
+                elapsed = time.perf_counter() - start
+
+                # uncomment these lines if you want to see the moves taken at each state
+                # if sol:
+                #     for move in sol[1][1:]:
+                #         print(move)
+
+                moves = solution_moves(sol)
+                if cache is not None:
+                    store(cache, initial_state, moves)
+
+            print_result(i, moves)
+
+            if stats is not None:
+                if args.stats == 'json':
+                    print(stats.to_json(test=i + 1, time=elapsed), file=sys.stderr, flush=True)
+                else:
+                    print(f"Test #{i + 1}: time={elapsed:.4f}s {stats}", file=sys.stderr, flush=True)
+
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+        cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+import os
+import signal
+from collections import deque
+from multiprocessing import Pool
+
+from structure.cache import MISSING
+from structure.gamestate import GameState
+
+# result of a puzzle whose solver ran out of time
+TIMED_OUT = 'timeout'
+
+
+class Unproven(tuple):
+    """
+    A solution, or its moves, that is not known to be the shortest one, like those of a search with
+    an inadmissible heuristic. It is reported like any other solution but only cached for the
+    solver that found it.
+    """
+
+
+class PuzzleTimeout(Exception):
+    """raised inside a worker when a puzzle takes longer than its timeout."""
+
+
+def raise_timeout(signum, frame):
+    raise PuzzleTimeout()
+
+
+def solution_moves(sol):
+    """
+    returns the moves of a solution returned by a search as (car index, signed distance) pairs,
+    or None if there is no solution. TIMED_OUT is passed through, and the moves of an Unproven
+    solution are Unproven too.
+    """
+    if sol == TIMED_OUT:
+        return TIMED_OUT
+
+    if not sol:
+        return None
+
+    solution_path, moves = sol
+    compact = []
+
+    for state, next_state in zip(solution_path, solution_path[1:]):
+        for car_idx, (position, next_position) in enumerate(zip(state.positions, next_state.positions)):
+            if position != next_position:
+                compact.append((car_idx, next_position - position))
+                break
+
+    return Unproven(compact) if isinstance(sol, Unproven) else compact
+
+
+def store(cache, state, moves):
+    """stores the result of a puzzle, as returned by solution_moves, in a SolutionCache unless it timed out."""
+    if moves != TIMED_OUT:
+        cache.put(state, moves, exact=not isinstance(moves, Unproven))
+
+
+def solve_task(task):
+    """
+    Solves one puzzle inside a worker process.
+
+    Returns:
+    list: The moves as returned by solution_moves, None if there is no solution or TIMED_OUT.
+    """
+    solver, (cars, rows, columns), timeout = task
+
+    # the alarm interrupts the search wherever it is; it only exists on unix
+    use_alarm = timeout and hasattr(signal, 'setitimer')
+
+    # the alarm may also go off while it is armed or disarmed, so both happen inside the outer try
+    try:
+        try:
+            if use_alarm:
+                signal.signal(signal.SIGALRM, raise_timeout)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+
+            return solution_moves(solver(GameState(cars, rows, columns)))
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except PuzzleTimeout:
+        return TIMED_OUT
+
+
+def solve_batch(parking_areas, solver, workers=None, timeout=None, max_tasks_per_child=None, cache=None):
+    """
+    Solves independent puzzles on a pool of worker processes.
+
+    Parameters:
+    parking_areas (iterable): (cars, rows, columns) tuples, as returned by get_data.
+    solver (callable): A picklable function from a GameState to a solution, like a_star.
+    workers (int): Number of worker processes, the number of CPUs by default.
+    timeout (float): Seconds a single puzzle may take before it is given up.
+    max_tasks_per_child (int): Puzzles a worker solves before it is replaced by a fresh process,
+    so the memory of one large search is given back.
+    cache (SolutionCache): Optional cache looked up before a puzzle is sent to the pool and
+    filled with the new solutions.
+
+    Returns:
+    generator: The result of every puzzle, in input order, as returned by solve_task.
+    """
+    # puzzles read ahead of the oldest unfinished one, so the input is not read all at once
+    window = 2 * (workers or os.cpu_count() or 1)
+
+    with Pool(processes=workers, maxtasksperchild=max_tasks_per_child) as pool:
+        pending = deque()
+
+        def finish():
+            state, moves, result = pending.popleft()
+            if result is None:
+                # answered by the cache
+                return moves
+
+            moves = result.get()
+            if cache is not None:
+                store(cache, state, moves)
+            return moves
+
+        for puzzle in parking_areas:
+            state = GameState(*puzzle) if cache is not None else None
+            moves = cache.get(state, MISSING) if cache is not None else MISSING
+
+            if moves is MISSING:
+                pending.append((state, None, pool.apply_async(solve_task, ((solver, puzzle, timeout),))))
+            else:
+                pending.append((state, moves, None))
+
+            # hand out every finished result at the head of the queue
+            while pending and (len(pending) > window or pending[0][2] is None or pending[0][2].ready()):
+                yield finish()
+
+        while pending:
+            yield finish()
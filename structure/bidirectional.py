@@ -0,0 +1,166 @@
+import itertools
+
+from structure.bitboard import reverse_slides, slides
+from structure.gamestate import GameState
+from structure.pattern_db import goal_configurations
+from structure.search import replay
+
+# goal configurations the backward search starts from at most; with more, only the forward search runs
+MAX_GOALS = 1 << 16
+
+
+def bidirectional_search(initial_state, max_goals=MAX_GOALS, stats=None):
+    """
+    Performs a breadth-first search forward from the initial state and backward from every goal
+    configuration at the same time, expanding one whole layer of the smaller frontier at a time,
+    until a state is reached from both sides. The goals are listed lazily: the backward search
+    only starts once the forward frontier has grown larger than the set of goals.
+
+    All moves cost one, so the first meeting is on a shortest path: before a layer is expanded no
+    path of length forward depth + backward depth exists, otherwise one of its states would already
+    have been reached from both sides, and a meeting in the new layer makes a path one move longer.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+    max_goals (int): The largest number of goal configurations searched backward from; layouts with
+    more are searched forward only, as a plain breadth-first search.
+    stats (SearchStats): Optional counters filled in during the search; peak_open is the largest
+    frontier and peak_visited the states reached from both sides together.
+
+    Returns:
+    tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+    """
+    if initial_state.is_goal():
+        return replay([initial_state])
+
+    layout = initial_state.layout
+    start = initial_state.positions
+
+    # the red car alone decides whether a state is a goal
+    goal_reds = {position for position in range(layout.lane_size(0) - layout.lengths[0] + 1)
+                 if GameState.from_layout(layout, (position,) + start[1:], 0).is_goal()}
+
+    # the state each state was reached from, forward, and the state it leads to, backward
+    forward = {start: None}
+    forward_frontier = [start]
+
+    # cars sharing a lane never pass each other, so goals with another order along a lane are out of reach
+    pending_goals = goal_configurations(layout, shared_lanes(layout, start))
+    goals = []
+
+    # the backward search starts once every goal is known, until then only the forward one runs
+    backward = {}
+    backward_frontier = None
+
+    while forward_frontier and backward_frontier != []:
+        if backward_frontier is None and pending_goals is not None:
+            # going backward only pays off once the forward frontier is larger than the set of goals,
+            # so the goals are only listed that far
+            wanted = min(len(forward_frontier), max_goals) + 1
+            goals.extend(itertools.islice(pending_goals, max(0, wanted - len(goals))))
+
+            if len(goals) < wanted:
+                backward = dict.fromkeys(goals)
+                backward_frontier = goals
+            elif len(goals) > max_goals:
+                pending_goals = None
+
+        if backward_frontier is None or len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_forward(layout, forward_frontier, forward, backward, goal_reds, stats)
+        else:
+            backward_frontier, meeting = expand_backward(layout, backward_frontier, backward, forward, stats)
+
+        if stats is not None:
+            stats.peak_open = max(stats.peak_open, len(forward_frontier) + len(backward_frontier or ()))
+            stats.peak_visited = max(stats.peak_visited, len(forward) + len(backward))
+
+        if meeting is not None:
+            return join(layout, forward, backward, meeting)
+
+    # one side ran out of states without meeting the other
+    return None
+
+
+def shared_lanes(layout, positions):
+    """returns (car, next car) index pairs of the cars that follow each other in a lane, in the given order."""
+    lanes = {}
+    for car_idx in range(len(layout)):
+        lanes.setdefault((layout.orientations[car_idx], layout.lanes[car_idx]), []).append(car_idx)
+
+    pairs = []
+    for cars in lanes.values():
+        cars.sort(key=lambda car_idx: positions[car_idx])
+        pairs.extend(zip(cars, cars[1:]))
+
+    return pairs
+
+
+def expand_forward(layout, frontier, forward, backward, goal_reds, stats=None):
+    """
+    expands a forward layer. returns the next layer and the first state also reached backward or
+    being a goal, or None.
+    """
+    next_frontier = []
+
+    for positions in frontier:
+        moves = slides(layout, positions)
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(moves)
+
+        for car_idx, distance in moves:
+            successor = positions[:car_idx] + (positions[car_idx] + distance,) + positions[car_idx + 1:]
+            if successor in forward:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+
+            forward[successor] = positions
+            if successor in backward or successor[0] in goal_reds:
+                return next_frontier, successor
+            next_frontier.append(successor)
+
+    return next_frontier, None
+
+
+def expand_backward(layout, frontier, backward, forward, stats=None):
+    """expands a backward layer. returns the next layer and the first state also reached forward, or None."""
+    next_frontier = []
+
+    for positions in frontier:
+        moves = reverse_slides(layout, positions)
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(moves)
+
+        for car_idx, distance in moves:
+            predecessor = positions[:car_idx] + (positions[car_idx] - distance,) + positions[car_idx + 1:]
+            if predecessor in backward:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+
+            backward[predecessor] = positions
+            if predecessor in forward:
+                return next_frontier, predecessor
+            next_frontier.append(predecessor)
+
+    return next_frontier, None
+
+
+def join(layout, forward, backward, meeting):
+    """rebuilds the solution through the state where both searches met."""
+    path = []
+    positions = meeting
+    while positions is not None:
+        path.append(positions)
+        positions = forward[positions]
+    path.reverse()
+
+    # goals reached forward before the backward search got to them are not in backward
+    positions = backward.get(meeting)
+    while positions is not None:
+        path.append(positions)
+        positions = backward[positions]
+
+    return replay([GameState.from_layout(layout, positions) for positions in path])
@@ -0,0 +1,145 @@
+from structure.move_table import free_ahead, free_behind
+
+
+class BitBoard:
+    """
+    Grid occupancy of a GameState kept as integer bitmasks, one per row and one per column.
+
+    Bit j of row_masks[i] (and bit i of col_masks[j]) is set when the cell (i, j) is taken by a car,
+    so the sliding distance of a car only depends on the mask of its own lane: it is read from the
+    move tables of the layout, or found with a bit scan on lanes too large for a table, instead of
+    checking every other car on the board.
+    """
+
+    __slots__ = ('layout', 'positions', 'row_masks', 'col_masks')
+
+    def __init__(self, layout, positions):
+        self.layout = layout
+        self.positions = positions
+        self.row_masks = [0] * layout.num_rows
+        self.col_masks = [0] * layout.num_cols
+
+        for orientation, length, lane, position in zip(layout.orientations, layout.lengths,
+                                                       layout.lanes, positions):
+            if orientation == 'h':
+                self.row_masks[lane] |= ((1 << length) - 1) << position
+                for col in range(position, position + length):
+                    self.col_masks[col] |= 1 << lane
+
+            elif orientation == 'v':
+                self.col_masks[lane] |= ((1 << length) - 1) << position
+                for row in range(position, position + length):
+                    self.row_masks[row] |= 1 << lane
+
+    def max_up(self, car_idx):
+        """returns the number of free cells above the given vertical car."""
+        layout = self.layout
+        row = self.positions[car_idx]
+        col_mask = self.col_masks[layout.lanes[car_idx]]
+
+        if layout.col_table is not None:
+            return layout.col_table.back[row][col_mask]
+
+        return free_behind(col_mask, row)
+
+    def max_down(self, car_idx):
+        """returns the number of free cells below the given vertical car."""
+        layout = self.layout
+        front = self.positions[car_idx] + layout.lengths[car_idx]
+        col_mask = self.col_masks[layout.lanes[car_idx]]
+
+        if layout.col_table is not None:
+            return layout.col_table.forward[front][col_mask]
+
+        return free_ahead(col_mask >> front, layout.num_rows - front)
+
+    def max_left(self, car_idx):
+        """returns the number of free cells to the left of the given horizontal car."""
+        layout = self.layout
+        col = self.positions[car_idx]
+        row_mask = self.row_masks[layout.lanes[car_idx]]
+
+        if layout.row_table is not None:
+            return layout.row_table.back[col][row_mask]
+
+        return free_behind(row_mask, col)
+
+    def max_right(self, car_idx):
+        """returns the number of free cells to the right of the given horizontal car."""
+        layout = self.layout
+        front = self.positions[car_idx] + layout.lengths[car_idx]
+        row_mask = self.row_masks[layout.lanes[car_idx]]
+
+        if layout.row_table is not None:
+            return layout.row_table.forward[front][row_mask]
+
+        return free_ahead(row_mask >> front, layout.num_cols - front)
+
+
+def slides(layout, positions):
+    """
+    returns the legal moves of the given positions as a list of (car index, signed distance) pairs,
+    in the order they are expanded. Every car slides as far as it can; a negative distance moves it
+    up or left, a positive one down or right.
+    """
+    board = BitBoard(layout, positions)
+    moves = []
+
+    for car_idx, position in enumerate(positions):
+        front = position + layout.lengths[car_idx]
+
+        if layout.orientations[car_idx] == 'v':
+            distance = board.max_up(car_idx)
+            if distance > 0:
+                moves.append((car_idx, -distance))
+
+            # a car ending on the second to last row counts as blocked downwards
+            if front != layout.num_rows - 1:
+                distance = board.max_down(car_idx)
+                if distance > 0:
+                    moves.append((car_idx, distance))
+
+        elif layout.orientations[car_idx] == 'h':
+            distance = board.max_left(car_idx)
+            if distance > 0:
+                moves.append((car_idx, -distance))
+
+            # a car ending on the second to last column counts as blocked to the right
+            if front != layout.num_cols - 1:
+                distance = board.max_right(car_idx)
+                if distance > 0:
+                    moves.append((car_idx, distance))
+
+    return moves
+
+
+def reverse_slides(layout, positions):
+    """
+    returns the moves leading into the given positions as a list of (car index, signed distance)
+    pairs: moving the car by -distance gives a predecessor, from which slides() makes exactly that move.
+    """
+    board = BitBoard(layout, positions)
+    moves = []
+
+    for car_idx, position in enumerate(positions):
+        length = layout.lengths[car_idx]
+
+        if layout.orientations[car_idx] == 'v':
+            back, forward = board.max_up(car_idx), board.max_down(car_idx)
+            lane_size = layout.num_rows
+        else:
+            back, forward = board.max_left(car_idx), board.max_right(car_idx)
+            lane_size = layout.num_cols
+
+        # the car came from below/right and stopped here because it can not go further up/left
+        if back == 0:
+            for distance in range(1, forward + 1):
+                moves.append((car_idx, -distance))
+
+        # the car came from above/left; it could only start if it was not ending on the second to last cell
+        if forward == 0:
+            for distance in range(1, back + 1):
+                if position - distance + length != lane_size - 1:
+                    moves.append((car_idx, distance))
+
+    return moves
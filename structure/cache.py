@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import time
+
+# returned by SolutionCache.get for puzzles that are not in the cache
+MISSING = object()
+
+# default size limit of the stored solutions, in bytes
+MAX_BYTES = 64 * 1024 * 1024
+
+# share of the entries dropped at once when the cache grows over its limit
+EVICT_FRACTION = 0.1
+
+
+def canonical(state):
+    """
+    Canonical encoding of a puzzle: board size, the red car and the other cars sorted.
+    Puzzles that only differ in the order of their cars get the same key.
+
+    Returns:
+    tuple: The key and the original index of every car in canonical order.
+    """
+    cars = [(car.row, car.col, car.orientation, car.length) for car in state.cars]
+    order = [0] + sorted(range(1, len(cars)), key=lambda car_idx: cars[car_idx])
+
+    key = json.dumps([state.num_rows, state.num_cols, [cars[car_idx] for car_idx in order]])
+    return key, order
+
+
+class SolutionCache:
+    """
+    Solutions kept across runs in a sqlite file, keyed by the canonical encoding of the puzzle.
+
+    A solution is stored as its length and its moves as (car index, signed distance) pairs;
+    unsolvable puzzles are stored too, with no length. When the stored data grows over max_bytes,
+    the least recently used entries are evicted.
+
+    Optimal solutions are served to every solver. Solutions that are not known to be optimal, like
+    those of a_star with an inadmissible heuristic, are keyed by config as well, a string naming
+    the solver and its options, so they are only served back to that same solver. Without a
+    config only optimal solutions are kept.
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, config=None):
+        self.max_bytes = max_bytes
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS solutions (
+                key TEXT PRIMARY KEY,
+                length INTEGER,
+                moves TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+        self.connection.commit()
+
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, state, default=None):
+        """
+        returns the moves of the solution of the given state as (car index, signed distance) pairs,
+        None if the puzzle is known to be unsolvable, or default if it is not in the cache.
+        """
+        key, order = canonical(state)
+        row = self.connection.execute("SELECT length, moves FROM solutions WHERE key = ?", (key,)).fetchone()
+
+        if row is None and self.config is not None:
+            key = self.config_key(key)
+            row = self.connection.execute("SELECT length, moves FROM solutions WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+
+        length, moves = row
+        if length is None:
+            return None
+
+        # the stored moves use the canonical car indices
+        return [(order[car_idx], distance) for car_idx, distance in json.loads(moves)]
+
+    def put(self, state, moves, exact=True):
+        """
+        stores the moves of the solution of the given state, or None if it is unsolvable; exact tells
+        whether the solution is known to be optimal.
+        """
+        key, order = canonical(state)
+
+        if not exact:
+            if self.config is None:
+                return
+            key = self.config_key(key)
+
+        if moves is None:
+            length, encoded = None, '[]'
+        else:
+            position = {car_idx: canonical_idx for canonical_idx, car_idx in enumerate(order)}
+            length = len(moves)
+            encoded = json.dumps([(position[car_idx], distance) for car_idx, distance in moves])
+
+        size = len(key) + len(encoded)
+
+        old = self.connection.execute("SELECT size FROM solutions WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self.size -= old[0]
+
+        self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?)",
+                                (key, length, encoded, size, time.time()))
+        self.size += size
+
+        if self.size > self.max_bytes:
+            self.evict()
+
+        self.connection.commit()
+
+    def config_key(self, key):
+        """the key of a solution of the config that is not known to be optimal."""
+        return f"{self.config}\n{key}"
+
+    def evict(self):
+        """drops the least recently used entries until the cache fits in max_bytes again."""
+        while self.size > self.max_bytes:
+            count = self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            limit = max(1, int(count * EVICT_FRACTION))
+
+            rows = self.connection.execute(
+                "SELECT key, size FROM solutions ORDER BY last_used LIMIT ?", (limit,)).fetchall()
+            if not rows:
+                break
+
+            self.connection.executemany("DELETE FROM solutions WHERE key = ?", [(key,) for key, size in rows])
+            self.size -= sum(size for key, size in rows)
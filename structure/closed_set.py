@@ -0,0 +1,118 @@
+from array import array
+from operator import mul
+
+# key of an unused slot; packed states are never negative
+EMPTY = -1
+
+# number of slots a PackedClosedSet starts with
+INITIAL_CAPACITY = 1 << 10
+
+# the table doubles once more than this fraction of its slots is taken
+MAX_LOAD = 0.5
+
+# multiplier of the fibonacci hashing of packed states, 2**64 divided by the golden ratio
+FIBONACCI = 0x9E3779B97F4A7C15
+
+
+def packing_strides(layout):
+    """
+    returns the strides of Layout.encoding, the weight of every car's position when a state is
+    packed into one integer, after checking that every packed state is below 2**63.
+    """
+    radices, strides, size = layout.encoding()
+
+    if size > 1 << 63:
+        raise ValueError("the layout has too many configurations to pack them in 64 bits")
+
+    return strides
+
+
+class PackedClosedSet:
+    """
+    Depth of every state reached by a search, in flat arrays instead of a dict of GameStates.
+
+    A state is packed into one integer, a mixed radix number with one digit per car like
+    PatternDatabase.index, and kept in an open addressing table with linear probing: one array of
+    64 bit keys and one of 32 bit depths. An entry takes 12 bytes per slot, a few dozen bytes per
+    state with the free slots, where a dict entry with its GameState takes a few hundred.
+
+    Supports the part of the dict interface a_star uses: get, [], in, len and assignment.
+    """
+
+    def __init__(self, layout, capacity=INITIAL_CAPACITY):
+        self.strides = packing_strides(layout)
+        self.size = 0
+        self.allocate(max(capacity, 2))
+
+    def allocate(self, capacity):
+        # a power of two, so the slot is taken from the top bits of the hash
+        self.bits = (capacity - 1).bit_length()
+        self.keys = array('q', [EMPTY]) * (1 << self.bits)
+        self.depths = array('i', [0]) * (1 << self.bits)
+
+    def pack(self, state):
+        return sum(map(mul, state.positions, self.strides))
+
+    def slot(self, key):
+        """returns the slot holding the given key, or the empty slot where it belongs."""
+        keys = self.keys
+        mask = len(keys) - 1
+        slot = (key * FIBONACCI & 0xFFFFFFFFFFFFFFFF) >> (64 - self.bits)
+
+        while True:
+            found = keys[slot]
+            if found == key or found == EMPTY:
+                return slot
+            slot = (slot + 1) & mask
+
+    def get(self, state, default=None):
+        key = self.pack(state)
+        slot = self.slot(key)
+        return self.depths[slot] if self.keys[slot] == key else default
+
+    def __getitem__(self, state):
+        depth = self.get(state)
+        if depth is None:
+            raise KeyError(state)
+        return depth
+
+    def __contains__(self, state):
+        return self.get(state) is not None
+
+    def __setitem__(self, state, depth):
+        key = self.pack(state)
+        slot = self.slot(key)
+
+        if self.keys[slot] == EMPTY:
+            self.keys[slot] = key
+            self.size += 1
+
+        self.depths[slot] = depth
+
+        if self.size > MAX_LOAD * len(self.keys):
+            self.grow()
+
+    def __len__(self):
+        return self.size
+
+    def grow(self):
+        """doubles the number of slots and inserts every entry again."""
+        keys, depths = self.keys, self.depths
+        self.allocate(2 * len(keys))
+
+        for key, depth in zip(keys, depths):
+            if key != EMPTY:
+                slot = self.slot(key)
+                self.keys[slot] = key
+                self.depths[slot] = depth
+
+
+def dict_closed_set(layout):
+    return {}
+
+
+# closed set implementations selectable by name in a_star; each one is created from the layout
+CLOSED_SETS = {
+    'dict': dict_closed_set,
+    'packed': PackedClosedSet,
+}
@@ -0,0 +1,250 @@
+import heapq
+import os
+import shutil
+import tempfile
+from array import array
+
+from structure.bitboard import slides
+from structure.closed_set import packing_strides
+from structure.gamestate import GameState
+from structure.search import replay
+
+# packed states sorted in memory before they are written out as one run
+RUN_SIZE = 1 << 20
+
+# runs merged at once; more runs are first merged into larger ones
+MERGE_FAN_IN = 64
+
+# packed states read from a file at a time
+READ_CHUNK = 1 << 13
+
+
+def external_bfs(initial_state, directory=None, run_size=RUN_SIZE, stats=None):
+    """
+    Performs a breadth-first search that keeps its layers and visited states on disk.
+
+    Every layer is a file of sorted packed states. Expanding a layer reads it sequentially and
+    spills the successors in sorted runs of at most run_size states; the runs are merged in one
+    streaming pass with the sorted file of every state visited so far, which drops the duplicates
+    and writes both the next layer and the new visited file. Memory stays bounded by run_size and
+    the merge buffers, whatever the size of the state space. The solution is rebuilt backwards by
+    scanning each earlier layer for a predecessor, so no parents are stored.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+    directory (str): Where the temporary files are created, the system temporary directory by default.
+    run_size (int): The number of states sorted in memory at once.
+    stats (SearchStats): Optional counters filled in during the search; peak_open is the size of
+    the largest layer.
+
+    Returns:
+    tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+    """
+    if initial_state.is_goal():
+        return replay([initial_state])
+
+    layout = initial_state.layout
+    strides = packing_strides(layout)
+
+    # the red car alone decides whether a state is a goal, and it is the lowest digit
+    red_positions = layout.lane_size(0) - layout.lengths[0] + 1
+    goal_reds = {position for position in range(red_positions)
+                 if GameState.from_layout(layout, (position,) + initial_state.positions[1:], 0).is_goal()}
+
+    work_dir = tempfile.mkdtemp(prefix='rush-hour-', dir=directory)
+    try:
+        start = sum(position * stride for position, stride in zip(initial_state.positions, strides))
+        write_states(layer_path(work_dir, 0), [start])
+        visited = os.path.join(work_dir, 'visited')
+        write_states(visited, [start])
+        if stats is not None:
+            stats.peak_visited = 1
+
+        depth = 0
+        while True:
+            runs = spill_successors(layout, strides, layer_path(work_dir, depth), work_dir, run_size, stats)
+            while len(runs) > MERGE_FAN_IN:
+                runs = runs[MERGE_FAN_IN:] + merge_runs(runs[:MERGE_FAN_IN], work_dir)
+
+            depth += 1
+            new_visited = os.path.join(work_dir, 'visited.new')
+            count, goal = merge_layer(runs, visited, new_visited, layer_path(work_dir, depth),
+                                      red_positions, goal_reds, stats)
+
+            for run in runs:
+                os.remove(run)
+            os.replace(new_visited, visited)
+
+            if stats is not None:
+                stats.peak_open = max(stats.peak_open, count)
+                stats.peak_visited += count
+
+            if goal is not None:
+                return backtrack(initial_state, strides, work_dir, depth, goal)
+
+            if not count:
+                return None
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def layer_path(work_dir, depth):
+    return os.path.join(work_dir, f'layer-{depth}')
+
+
+def write_states(path, states):
+    with open(path, 'wb') as f:
+        array('Q', states).tofile(f)
+
+
+def read_states(path):
+    """yields the packed states of a file in order, reading it in chunks."""
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(READ_CHUNK * 8)
+            if not data:
+                return
+            yield from array('Q', data)
+
+
+class StateWriter:
+    """writes packed states to a file through a buffer of READ_CHUNK states."""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.buffer = array('Q')
+
+    def write(self, state):
+        self.buffer.append(state)
+        if len(self.buffer) >= READ_CHUNK:
+            self.flush()
+
+    def flush(self):
+        self.buffer.tofile(self.file)
+        self.buffer = array('Q')
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def unique(states):
+    """drops the repeated states of a sorted stream."""
+    last = None
+    for state in states:
+        if state != last:
+            yield state
+            last = state
+
+
+def spill_successors(layout, strides, layer, work_dir, run_size, stats=None):
+    """expands every state of a layer file and returns the sorted run files of their successors."""
+    runs = []
+    buffer = []
+
+    def spill():
+        path = os.path.join(work_dir, f'run-{len(runs)}')
+        write_states(path, unique(sorted(buffer)))
+        runs.append(path)
+        buffer.clear()
+
+    radices = layout.encoding()[0]
+
+    for state in read_states(layer):
+        # the successor of a slide only changes one digit of the packed state
+        for car_idx, distance in slides(layout, unpack(state, radices)):
+            buffer.append(state + distance * strides[car_idx])
+
+            if stats is not None:
+                stats.generated += 1
+
+        if stats is not None:
+            stats.expanded += 1
+
+        if len(buffer) >= run_size:
+            spill()
+
+    if buffer:
+        spill()
+
+    return runs
+
+
+def merge_runs(runs, work_dir):
+    """merges sorted run files into one, removing them; returns a list with the new run."""
+    path = os.path.join(work_dir, f'merged-{os.path.basename(runs[0])}')
+    writer = StateWriter(path)
+    for state in unique(heapq.merge(*(read_states(run) for run in runs))):
+        writer.write(state)
+    writer.close()
+
+    for run in runs:
+        os.remove(run)
+    return [path]
+
+
+def merge_layer(runs, visited, new_visited, layer, red_positions, goal_reds, stats=None):
+    """
+    merges the successor runs with the visited file. The successors not visited before make up the
+    next layer and are added to the new visited file.
+
+    Returns:
+    tuple: The number of states in the new layer and the first goal state among them, or None.
+    """
+    layer_writer = StateWriter(layer)
+    visited_writer = StateWriter(new_visited)
+    count = 0
+    goal = None
+
+    old = read_states(visited)
+    seen = next(old, None)
+
+    for state in unique(heapq.merge(*(read_states(run) for run in runs))):
+        while seen is not None and seen < state:
+            visited_writer.write(seen)
+            seen = next(old, None)
+
+        if seen == state:
+            if stats is not None:
+                stats.duplicates += 1
+            continue
+
+        visited_writer.write(state)
+        layer_writer.write(state)
+        count += 1
+
+        if goal is None and state % red_positions in goal_reds:
+            goal = state
+
+    while seen is not None:
+        visited_writer.write(seen)
+        seen = next(old, None)
+
+    layer_writer.close()
+    visited_writer.close()
+    return count, goal
+
+
+def unpack(state, radices):
+    """returns the car positions of a packed state."""
+    positions = []
+    for radix in radices:
+        state, position = divmod(state, radix)
+        positions.append(position)
+
+    return tuple(positions)
+
+
+def backtrack(initial_state, strides, work_dir, depth, goal):
+    """rebuilds the solution to a goal of the given layer, finding a predecessor in every layer before."""
+    layout = initial_state.layout
+    radices = layout.encoding()[0]
+
+    path = [goal]
+    for layer in range(depth - 1, -1, -1):
+        path.append(next(state for state in read_states(layer_path(work_dir, layer))
+                         if any(state + distance * strides[car_idx] == path[-1]
+                                for car_idx, distance in slides(layout, unpack(state, radices)))))
+
+    return replay([GameState.from_layout(layout, unpack(state, radices)) for state in reversed(path)])
@@ -0,0 +1,163 @@
+"""
+Breadth-first search that expands a whole layer at a time with NumPy.
+
+This module needs NumPy, which the rest of the solver does not.
+"""
+import numpy as np
+
+from structure.closed_set import packing_strides
+from structure.gamestate import GameState
+from structure.node import Node
+from structure.search import replay
+
+
+def layered_bfs(initial_state):
+    """
+    Performs a breadth-first search layer by layer. A layer is held as one array of car positions;
+    the legal slides of all its states are computed at once from their occupancy grids, and the next
+    layer is deduplicated by sorting the encoded states. All moves cost one, so the first layer that
+    holds a goal gives an optimal solution.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+
+    Returns:
+    tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+    """
+    if initial_state.is_goal():
+        return Node(initial_state, 0).reconstruct_path()
+
+    layout = initial_state.layout
+    strides = np.array(packing_strides(layout), dtype=np.int64)
+
+    frontier = np.array([initial_state.positions], dtype=np.int8)
+    visited = frontier.astype(np.int64) @ strides
+
+    # every layer and the index of the parent of each of its states in the layer before
+    layers = [frontier]
+    parents = [None]
+
+    while len(frontier):
+        children, parent_idx = expand(layout, frontier)
+
+        # keep the first copy of every new state
+        keys, first = np.unique(children.astype(np.int64) @ strides, return_index=True)
+        new = ~np.isin(keys, visited, assume_unique=True)
+        keys, first = keys[new], first[new]
+
+        frontier = children[first]
+        layers.append(frontier)
+        parents.append(parent_idx[first])
+
+        goals = np.nonzero(goal_mask(layout, frontier))[0]
+        if len(goals):
+            return backtrack(initial_state, layers, parents, goals[0])
+
+        visited = np.union1d(visited, keys)
+
+    return None
+
+
+def goal_mask(layout, frontier):
+    """vectorized GameState.is_goal over a layer."""
+    if layout.orientations[0] == 'h':
+        return frontier[:, 0].astype(np.int64) + layout.lengths[0] >= layout.num_cols - 1
+
+    return np.full(len(frontier), layout.lanes[0] <= 0)
+
+
+def occupancy(layout, frontier):
+    """returns a (states, rows, columns) boolean array of the cells taken in every state."""
+    states = np.arange(len(frontier))
+    grid = np.zeros((len(frontier), layout.num_rows, layout.num_cols), dtype=bool)
+
+    for car_idx in range(len(layout)):
+        positions = frontier[:, car_idx].astype(np.intp)
+        lane = layout.lanes[car_idx]
+
+        for k in range(layout.lengths[car_idx]):
+            if layout.orientations[car_idx] == 'h':
+                grid[states, lane, positions + k] = True
+            else:
+                grid[states, positions + k, lane] = True
+
+    return grid
+
+
+def free_run(line, start, step):
+    """
+    counts, for every state, the free cells of a lane starting at start and going in the direction
+    of step, up to the first taken cell or the edge of the board.
+    """
+    num_states, size = line.shape
+    states = np.arange(num_states)
+    run = np.zeros(num_states, dtype=np.int64)
+    free = np.ones(num_states, dtype=bool)
+
+    for d in range(size):
+        cell = start + step * d
+        free &= (cell >= 0) & (cell < size)
+
+        still = np.nonzero(free)[0]
+        if not len(still):
+            break
+
+        free[still] = ~line[states[still], cell[still]]
+        run += free
+
+    return run
+
+
+def expand(layout, frontier):
+    """
+    returns the successors of every state of a layer, following the same rules as slides(),
+    and the index of the state each successor comes from.
+    """
+    grid = occupancy(layout, frontier)
+    children = []
+    parent_idx = []
+
+    for car_idx in range(len(layout)):
+        position = frontier[:, car_idx].astype(np.int64)
+        front = position + layout.lengths[car_idx]
+        lane = layout.lanes[car_idx]
+
+        if layout.orientations[car_idx] == 'v':
+            line = grid[:, :, lane]
+        else:
+            line = grid[:, lane, :]
+
+        back = free_run(line, position - 1, -1)
+        forward = free_run(line, front, 1)
+
+        # a car ending on the second to last cell of its lane counts as blocked forward
+        forward[front == line.shape[1] - 1] = 0
+
+        for distance, sign in ((back, -1), (forward, 1)):
+            moving = np.nonzero(distance)[0]
+            if not len(moving):
+                continue
+
+            moved = frontier[moving].copy()
+            moved[:, car_idx] += (sign * distance[moving]).astype(np.int8)
+            children.append(moved)
+            parent_idx.append(moving)
+
+    if not children:
+        return np.empty((0, len(layout)), dtype=np.int8), np.empty(0, dtype=np.intp)
+
+    return np.concatenate(children), np.concatenate(parent_idx)
+
+
+def backtrack(initial_state, layers, parents, index):
+    """rebuilds the solution ending at the given state of the last layer."""
+    positions = []
+    for depth in range(len(layers) - 1, 0, -1):
+        positions.append(tuple(int(position) for position in layers[depth][index]))
+        index = parents[depth][index]
+
+    states = [initial_state]
+    for state_positions in reversed(positions):
+        states.append(GameState.from_layout(initial_state.layout, state_positions))
+
+    return replay(states)
@@ -1,35 +1,83 @@
-from structure.car import Car
+from structure.bitboard import BitBoard
+from structure.layout import Layout
+from structure.move_table import free_ahead, free_behind
 
 
 class GameState:
+    """
+    A configuration of the cars on the board.
+
+    The orientation, length and lane of the cars live in a Layout shared by all states of the puzzle,
+    so a state only keeps the position of every car along its lane and its zobrist hash.
+    """
+
+    __slots__ = ('layout', 'positions', '_hash', '_cars')
+
     def __init__(self, cars, num_rows, num_cols):
-        self.cars = cars
-        self.num_rows = num_rows
-        self.num_cols = num_cols
+        self.layout, self.positions = Layout.from_cars(cars, num_rows, num_cols)
+        self._hash = self.layout.hash_positions(self.positions)
+        self._cars = None
+
+    @classmethod
+    def from_layout(cls, layout, positions, hash_value=None):
+        """makes a GameState directly from a layout and the positions of its cars."""
+        state = cls.__new__(cls)
+        state.layout = layout
+        state.positions = positions
+        state._hash = layout.hash_positions(positions) if hash_value is None else hash_value
+        state._cars = None
+        return state
+
+    @property
+    def num_rows(self):
+        return self.layout.num_rows
+
+    @property
+    def num_cols(self):
+        return self.layout.num_cols
+
+    @property
+    def cars(self):
+        """the Car objects of the state, built on first access."""
+        if self._cars is None:
+            self._cars = [self.layout.make_car(car_idx, position) for car_idx, position in enumerate(self.positions)]
+        return self._cars
 
     def __eq__(self, other):
-        # compare each car's attributes for all cars
+        # compare the position of every car
         return isinstance(other, GameState) \
-               and all(c1.row == c2.row and c1.col == c2.col and c1.orientation == c2.orientation
-                       for c1, c2 in zip(self.cars, other.cars))
+               and self.positions == other.positions \
+               and (self.layout is other.layout or self.layout == other.layout)
 
     def __hash__(self):
-        # create a hash based on the tuple of all relevant car properties
-        return hash(tuple((car.row, car.col, car.orientation, car.length) for car in self.cars))
+        # the zobrist hash is kept up to date by move()
+        return self._hash
+
+    def move(self, car_idx, delta):
+        """
+        makes a new GameState where only the given car is shifted by delta along its lane.
+        the hash of the new state is updated from the old one in constant time.
+        """
+        old = self.positions[car_idx]
+        new = old + delta
+        keys = self.layout.zobrist[car_idx]
+
+        positions = self.positions[:car_idx] + (new,) + self.positions[car_idx + 1:]
+        return GameState.from_layout(self.layout, positions, self._hash ^ keys[old] ^ keys[new])
 
     def is_goal(self):
-        red_car = self.cars[0]
+        layout = self.layout
 
-        if red_car.orientation == 'h':
-            exit_col = red_car.col + red_car.length
+        if layout.orientations[0] == 'h':
+            exit_col = self.positions[0] + layout.lengths[0]
 
             # the goal is reached when the red car reaches the right boundary
-            if exit_col >= self.num_cols - 1:
+            if exit_col >= layout.num_cols - 1:
                 return True
 
-        elif red_car.orientation == 'v':
+        elif layout.orientations[0] == 'v':
             # the goal is reached when the red car reaches the top boundary
-            if red_car.col <= 0:
+            if layout.lanes[0] <= 0:
                 return True
 
         return False
@@ -44,180 +92,79 @@ class GameState:
         # at least one car is blocking the way
         blocking = 1
 
-        red_car = self.cars[0]
+        layout = self.layout
+        red_lane = layout.lanes[0]
+        red_pos = self.positions[0]
 
-        if red_car.orientation == 'h':
-            for car in self.cars:
-                if car == red_car or car.col < red_car.col:
-                    continue
-
-                # both cars are on the same row
-                if car.orientation == 'h' and car.row == red_car.row:
-                    blocking += 1
-                    continue
+        if layout.orientations[0] == 'h':
+            for car_idx in range(1, len(layout)):
+                if layout.orientations[car_idx] == 'h':
+                    # both cars are on the same row
+                    if layout.lanes[car_idx] == red_lane and self.positions[car_idx] >= red_pos:
+                        blocking += 1
 
                 # the vertically oriented car intersects with the red car's path
-                elif car.orientation == 'v' and red_car.row in interval(car.row, car.length):
+                elif layout.lanes[car_idx] >= red_pos \
+                        and 0 <= red_lane - self.positions[car_idx] < layout.lengths[car_idx]:
                     blocking += 1
 
-        elif red_car.orientation == 'v':
-            for car in self.cars:
-                if car == red_car or car.row > red_car.row + red_car.length:
-                    continue
+        elif layout.orientations[0] == 'v':
+            red_front = red_pos + layout.lengths[0]
 
-                # both cars are on the same column
-                if car.orientation == 'v' and car.col == red_car.col:
-                    blocking += 1
+            for car_idx in range(1, len(layout)):
+                if layout.orientations[car_idx] == 'v':
+                    # both cars are on the same column
+                    if layout.lanes[car_idx] == red_lane and self.positions[car_idx] <= red_front:
+                        blocking += 1
 
                 # the horizontally oriented car intersects with the red car's path
-                elif car.orientation == 'h' and red_car.col in interval(car.col, car.length):
+                elif layout.lanes[car_idx] <= red_front \
+                        and 0 <= red_lane - self.positions[car_idx] < layout.lengths[car_idx]:
                     blocking += 1
 
         return blocking
 
-    def max_up(self, car):
+    def lane_moves(self, car):
         """
-        This function calculates the maximum number of spaces the given car can move upwards.
+        returns the number of free cells behind (up or left) and ahead of (down or right) the given car,
+        read from the move tables of the layout with the occupancy of the car's lane.
         """
+        layout = self.layout
+        board = BitBoard(layout, self.positions)
 
-        # car is on the first row
-        if car.row == 0:
-            return 0
-
-        free_spaces = set()
-
-        for other_car in self.cars:
-            if other_car == car:
-                # skip the car itself
-                continue
-
-            if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
-                # other_car is in the way at some point; could be above or below the car
-                if other_car.row < car.row:
-                    # other_car is above the car
-                    free_spaces.add(car.row - (other_car.row + 1))
+        if car.orientation == 'h':
+            mask, position, table, size = board.row_masks[car.row], car.col, layout.row_table, layout.num_cols
+        else:
+            mask, position, table, size = board.col_masks[car.col], car.row, layout.col_table, layout.num_rows
 
-            elif other_car.orientation == 'v' and other_car.col == car.col:
-                # other_car is in the way at some point; could be over or under the car
-                if other_car.row + other_car.length < car.row:
-                    # other_car is above the car
-                    free_spaces.add(car.row - (other_car.row + other_car.length))
+        front = position + car.length
+        if table is not None:
+            return table.back[position][mask], table.forward[front][mask]
 
-        if free_spaces:
-            moves = min(free_spaces)
-            return moves
+        # the lane is too large for a table
+        return free_behind(mask, position), free_ahead(mask >> front, size - front)
 
-        else:
-            # if no cars are blocking the way, the car can move up to the first row
-            return car.row
+    def max_up(self, car):
+        """
+        This function calculates the maximum number of spaces the given car can move upwards.
+        """
+        return self.lane_moves(car)[0]
 
     def max_down(self, car):
         """This function calculates the maximum number of spaces the given car can move downwards."""
-
-        if car.row + car.length == self.num_rows:
-            # the car is at the bottom of the grid
-            return 0
-
-        free_spaces = set()
-        for other_car in self.cars:
-            if other_car == car:
-                # skip the car itself
-                continue
-
-            if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
-                # other_car is in the way at some point; could be above or below the car
-                if other_car.row >= car.row + car.length:
-                    # other_car is below the car
-                    free_spaces.add((other_car.row - (car.row + car.length)))
-
-            elif other_car.orientation == 'v' and other_car.col == car.col:
-                if other_car.row > car.row:
-                    # other_car is below the car
-                    free_spaces.add((other_car.row - (car.row + car.length)))
-
-        if free_spaces:
-            moves = min(free_spaces)
-
-        else:
-            # if no cars are blocking the way, the car can move down to the last row
-            moves = self.num_rows - (car.row + car.length)
-
-        return moves
+        return self.lane_moves(car)[1]
 
     def max_right(self, car):
         """
         This function calculates the maximum number of spaces the given car can move to the right.
         """
-
-        if car.col + car.length == self.num_cols:
-            # car is at the far right of the grid
-            return 0
-
-        free_spaces = set()
-        car_front = car.col + car.length
-
-        for other_car in self.cars:
-            if other_car == car:
-                # skip the car itself
-                continue
-
-            if other_car.orientation == 'h' and other_car.row == car.row:
-                # both cars are on the same row
-                if car_front <= other_car.col:
-                    # other_car is to the right of the car
-                    free_spaces.add(other_car.col - car_front)
-
-            elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
-                # other_car is in the way of car at some point
-                if other_car.col >= car_front:
-                    # other_car is to the right of the car
-                    free_spaces.add(other_car.col - car_front)
-
-        if free_spaces:
-            moves = min(free_spaces)
-            return moves
-
-        else:
-            # if no cars are blocking, the car can move right to the last column
-            moves = self.num_cols - car_front
-
-        return moves
+        return self.lane_moves(car)[1]
 
     def max_left(self, car):
         """
         This function calculates the maximum number of spaces the given car can move to the left.
         """
-
-        if car.col == 0:
-            # car is at the far left of the grid
-            return 0
-
-        free_spaces = set()
-
-        for other_car in self.cars:
-            if other_car == car:
-                # skip the car itself
-                continue
-
-            if other_car.orientation == 'h' and other_car.row == car.row:
-                # other_car is on the same row as the car
-                if other_car.col + other_car.length <= car.col:
-                    # other_car is to the left of the car
-                    free_spaces.add(car.col - (other_car.col + other_car.length))
-
-            elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
-                # other_car is on the same row as the car
-                if other_car.col + 1 <= car.col:
-                    # other_car is to the left of the car
-                    free_spaces.add(car.col - (other_car.col + 1))
-
-        if free_spaces:
-            moves = min(free_spaces)
-            return moves
-
-        else:
-            # if no cars are blocking the way, the car can move left to the first column
-            return car.col
+        return self.lane_moves(car)[0]
 
     def go_up(self, car, moves):
         """
@@ -227,14 +174,8 @@ class GameState:
 
         car_index = self.cars.index(car)
 
-        # copying the cars in the current state
-        new_cars = [Car(c.row, c.col, c.orientation, c.length) for c in self.cars]
-
-        # move the car upwards in the new list of cars
-        new_cars[car_index].row -= moves
-
-        # return a new GameState with the new configuration of cars
-        return GameState(new_cars, self.num_rows, self.num_cols)
+        # only the moved car changes, the rest of the state is shared
+        return self.move(car_index, -moves)
 
     def go_down(self, car, moves):
         """
@@ -244,14 +185,8 @@ class GameState:
 
         car_index = self.cars.index(car)
 
-        # copying the cars in the current state
-        new_cars = [Car(c.row, c.col, c.orientation, c.length) for c in self.cars]
-
-        # move the car downwards in the new list of cars
-        new_cars[car_index].row += moves
-
-        # return a new GameState with the new configuration of cars
-        return GameState(new_cars, self.num_rows, self.num_cols)
+        # only the moved car changes, the rest of the state is shared
+        return self.move(car_index, moves)
 
     def go_right(self, car, moves):
         """
@@ -261,14 +196,8 @@ class GameState:
 
         car_index = self.cars.index(car)
 
-        # copying the cars in the current state
-        new_cars = [Car(c.row, c.col, c.orientation, c.length) for c in self.cars]
-
-        # move the car to the right in the new list of cars
-        new_cars[car_index].col += moves
-
-        # return a new GameState with the new configuration of cars
-        return GameState(new_cars, self.num_rows, self.num_cols)
+        # only the moved car changes, the rest of the state is shared
+        return self.move(car_index, moves)
 
     def go_left(self, car, moves):
         """
@@ -278,14 +207,8 @@ class GameState:
 
         car_index = self.cars.index(car)
 
-        # copying the cars in the current state
-        new_cars = [Car(c.row, c.col, c.orientation, c.length) for c in self.cars]
-
-        # move the car to the left in the new list of cars
-        new_cars[car_index].col -= moves
-
-        # return a new GameState with the new configuration of cars
-        return GameState(new_cars, self.num_rows, self.num_cols)
+        # only the moved car changes, the rest of the state is shared
+        return self.move(car_index, -moves)
 
     def blocked_directions(self, car):
         """
@@ -293,92 +216,23 @@ class GameState:
         """
 
         blocked_directions = set()
+        back, forward = self.lane_moves(car)
 
         if car.orientation == 'h':
             # the car is horizontal -> possible directions are :l(left) and r(right)
-            if car.col == 0:
-                # car is at the far left of the grid
-                blocked_directions.add('l')
-
-            if car.front() == self.num_cols-1:
-                # car is at the far right of the grid
-                blocked_directions.add('r')
-
-            for other_car in self.cars:
-                if other_car == car:
-                    # skip the car itself
-                    continue
-
-                if 'l' in blocked_directions and 'r' in blocked_directions:
-                    # if both directions are already blocked, no need to check further
-                    break
-
-                if other_car.orientation == 'h' and car.row == other_car.row:
-                    # both cars are on the same row
-                    if car.col == other_car.front():
-                        # the left side of car is overlapping with the right side of other_car
-                        blocked_directions.add('l')
-
-                    elif car.front() == other_car.col:
-                        # the car's front is overlapping with the start of other_car
-                        blocked_directions.add('r')
-
-                elif other_car.orientation == 'v' and car.row in interval(other_car.row, other_car.length):
-                    # other car is in the way at some point
-                    if car.col == other_car.col + 1:
-                        # the start of the car is overlapping with the right side of other_car
-                        blocked_directions.add('l')
-
-                    elif car.front() == other_car.col:
-                        # the car's front is overlapping with the left side of other_car
-                        blocked_directions.add('r')
-
-        elif car.orientation == 'v':
-
-            if car.row == 0:
-                # the car is on the first row
-                blocked_directions.add('u')
-
-            if car.front() == self.num_rows-1:
-                # the car is at the bottom of the grid
-                blocked_directions.add('d')
-
+            names, size = ('l', 'r'), self.num_cols
+        else:
             # the car is vertical -> possible directions are :u(up) and d(down)
-            for other_car in self.cars:
-
-                if other_car == car:
-                    # skip the car itself
-                    continue
-
-                if 'u' in blocked_directions and 'd' in blocked_directions:
-                    # if both directions are already blocked, no need to check further
-                    break
+            names, size = ('u', 'd'), self.num_rows
 
-                if other_car.orientation == 'h' and car.col in interval(other_car.col, other_car.length):
-                    # other_car is in the way of the car at some point
-                    if car.row == other_car.row + 1:
-                        # the top of the car is overlapping with the bottom of other_car
-                        blocked_directions.add('u')
+        if back == 0:
+            # the car is at the start of its lane or right behind another car
+            blocked_directions.add(names[0])
 
-                    elif car.front() == other_car.row:
-                        # the bottom of the car is overlapping with the top of other_car
-                        blocked_directions.add('d')
-
-                if other_car.orientation == 'v' and car.col == other_car.col:
-                    # other_car is  in the way of the car at some point
-                    if car.row == other_car.front():
-                        # the top of the car is overlapping with the bottom of other_car
-                        blocked_directions.add('u')
-
-                    elif car.front() == other_car.row:
-                        # bottom of the car is overlapping with the top of other_car
-                        blocked_directions.add('d')
+        # a car ending on the second to last cell counts as blocked; at the very end of its lane
+        # there is no car ahead of it to block it
+        if car.front() == size - 1 or (car.front() < size and forward == 0):
+            blocked_directions.add(names[1])
 
         return blocked_directions
 
-
-def interval(start, length):
-    """
-    returns a set of integers representing the range from start to start + length - 1.
-    """
-    return set(range(start, start + length))
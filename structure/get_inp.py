@@ -1,23 +1,77 @@
+import mmap
+import sys
+
 from structure.car import Car
 
+# bytes read from the input at a time
+CHUNK_SIZE = 1 << 16
+
+
+def read_tokens(stream):
+    """yields the whitespace separated tokens of a binary stream, reading it in large chunks."""
+    pending = b''
+
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+
+        tokens = (pending + chunk).split()
+
+        # the last token may go on in the next chunk
+        pending = b'' if chunk[-1:].isspace() or not tokens else tokens.pop()
+        yield from tokens
+
+    if pending:
+        yield pending
 
-def get_data():
-    t = int(input())
 
-    parking_areas = []
+def get_data(path=None):
+    """
+    Reads the tests from the standard input, or from a memory mapped file when a path is given.
+
+    Tests are yielded one by one as soon as they are parsed, so solving can start before the
+    whole input has been read.
+
+    Returns:
+    generator: (cars, rows, columns) tuples, one per test.
+    """
+    if path is None:
+        yield from parse_tests(read_tokens(sys.stdin.buffer))
+        return
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield from parse_tests(read_tokens(data))
+
+
+def parse_tests(tokens):
+    """
+    parses the tests from an iterator of tokens, as yielded by read_tokens.
+    raises ValueError when the tokens end in the middle of a test.
+    """
+    t = int(next_token(tokens))
 
     for i in range(t):
 
-        n, m, v = map(int, input().split())
+        n, m, v = int(next_token(tokens)), int(next_token(tokens)), int(next_token(tokens))
 
         cars = []
         for j in range(v):
-            row, column, orientation, length = input().split()
-            row = int(row) - 1
-            column = int(column) - 1
-            length = int(length)
+            row = int(next_token(tokens)) - 1
+            column = int(next_token(tokens)) - 1
+            orientation = next_token(tokens).decode()
+            length = int(next_token(tokens))
             cars.append(Car(row, column, orientation, length))
 
-        parking_areas.append((cars, n, m))
+        yield cars, n, m
+
 
-    return parking_areas
+def next_token(tokens):
+    """
+    returns the next token. Running out of tokens raises ValueError, as a StopIteration inside
+    parse_tests would turn into a RuntimeError.
+    """
+    token = next(tokens, None)
+    if token is None:
+        raise ValueError("unexpected end of input")
+    return token
@@ -0,0 +1,179 @@
+from structure.bitboard import BitBoard
+
+# heuristics selectable by name in a_star; each one maps a GameState to a lower bound of its distance to the goal
+HEURISTICS = {}
+
+# names of the heuristics that never overestimate, so a_star and ida_star find optimal solutions with them
+ADMISSIBLE = set()
+
+
+def register_heuristic(name, admissible=False):
+    """decorator that adds a heuristic function to HEURISTICS under the given name."""
+    def register(func):
+        HEURISTICS[name] = func
+        if admissible:
+            ADMISSIBLE.add(name)
+        return func
+
+    return register
+
+
+def get_heuristic(heuristic):
+    """returns the heuristic function for a name from HEURISTICS; functions are returned unchanged."""
+    if callable(heuristic):
+        return heuristic
+
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"unknown heuristic '{heuristic}', expected one of: {', '.join(HEURISTICS)}")
+    return HEURISTICS[heuristic]
+
+
+@register_heuristic('blocking')
+def blocking(state):
+    """
+    The original GameState.heuristic. It also counts vertical cars standing in the last column,
+    which the red car never has to pass, so it is not admissible on such boards.
+    """
+    return state.heuristic()
+
+
+@register_heuristic('zero', admissible=True)
+def zero(state):
+    """no guidance at all; a_star becomes a uniform cost search."""
+    return 0
+
+
+def path_blockers(state):
+    """
+    returns the indices of the cars standing on the cells the horizontal red car has to cross
+    to reach the goal, that is up to the second to last column of its row.
+    """
+    layout = state.layout
+    red_row = layout.lanes[0]
+    red_front = state.positions[0] + layout.lengths[0]
+    last = layout.num_cols - 2
+
+    blockers = []
+    for car_idx in range(1, len(layout)):
+        position = state.positions[car_idx]
+
+        if layout.orientations[car_idx] == 'v':
+            if red_front <= layout.lanes[car_idx] <= last and 0 <= red_row - position < layout.lengths[car_idx]:
+                blockers.append(car_idx)
+
+        elif layout.lanes[car_idx] == red_row and red_front <= position <= last:
+            blockers.append(car_idx)
+
+    return blockers
+
+
+@register_heuristic('blockers', admissible=True)
+def blockers(state):
+    """
+    one move for the red car plus one for every car on its way to the goal.
+    Unlike 'blocking', only the cells the red car really has to cross are checked.
+    """
+    if state.is_goal():
+        return 0
+
+    if state.layout.orientations[0] != 'h':
+        # the goal of a vertical red car does not depend on the other cars
+        return 1
+
+    return 1 + len(path_blockers(state))
+
+
+def clearing_cars(state, board, car_idx, red_row):
+    """
+    returns the cars that keep the given vertical blocker from leaving the red car's row,
+    as one set for leaving upwards and one for leaving downwards; None stands for a side
+    that runs off the board.
+    """
+    layout = state.layout
+    position = state.positions[car_idx]
+    length = layout.lengths[car_idx]
+    col_mask = board.col_masks[layout.lanes[car_idx]]
+
+    # leaving upwards, the top of the car has to reach row red_row - length
+    up_rows = range(red_row - length, position) if red_row - length >= 0 else None
+
+    # leaving downwards, the bottom of the car has to reach row red_row + length
+    down_rows = range(position + length, red_row + length + 1) if red_row + length < layout.num_rows else None
+
+    sides = []
+    for rows in (up_rows, down_rows):
+        if rows is None:
+            sides.append(None)
+            continue
+
+        cars = set()
+        for row in rows:
+            if col_mask >> row & 1:
+                cars.add(car_at(state, row, layout.lanes[car_idx]))
+        sides.append(cars)
+
+    return sides
+
+
+def car_at(state, row, col):
+    """returns the index of the car covering the given cell."""
+    layout = state.layout
+
+    for car_idx, position in enumerate(state.positions):
+        if layout.orientations[car_idx] == 'h':
+            if layout.lanes[car_idx] == row and 0 <= col - position < layout.lengths[car_idx]:
+                return car_idx
+
+        elif layout.lanes[car_idx] == col and 0 <= row - position < layout.lengths[car_idx]:
+            return car_idx
+
+    return None
+
+
+@register_heuristic('blockers_of_blockers', admissible=True)
+def blockers_of_blockers(state):
+    """
+    'blockers' plus the cars that have to move before a blocker can leave the red car's row.
+
+    A vertical blocker can leave upwards or downwards. When both ways are blocked by cars that
+    are not counted yet (or run off the board), at least one of those cars has to move too.
+    Blockers whose sets of such cars are disjoint need different cars to move, so one extra
+    move is added for each of them.
+    """
+    if state.is_goal():
+        return 0
+
+    layout = state.layout
+    if layout.orientations[0] != 'h':
+        return 1
+
+    blocking_cars = path_blockers(state)
+    counted = set(blocking_cars)
+    counted.add(0)
+
+    board = BitBoard(layout, state.positions)
+    red_row = layout.lanes[0]
+    used = set()
+    extra = 0
+
+    for car_idx in blocking_cars:
+        if layout.orientations[car_idx] != 'v':
+            # a horizontal car in the red car's row can never leave it
+            continue
+
+        needed = set()
+        free_side = False
+        for side in clearing_cars(state, board, car_idx, red_row):
+            if side is None:
+                continue
+            if not side - counted:
+                # this side can be cleared without moving any car that is not counted yet
+                free_side = True
+                break
+            needed |= side - counted
+
+        if not free_side and not needed & used:
+            used |= needed
+            extra += 1
+
+    return 1 + len(blocking_cars) + extra
@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import math
+from collections import OrderedDict
+
+from structure.car import Car
+from structure.gamestate import GameState
+from structure.heuristics import get_heuristic
+from structure.search import replay, solution_states, successor_states
+
+# layouts whose search results are kept, the least recently solved one is dropped first
+MAX_LAYOUTS = 16
+
+# learned heuristic values kept per layout before they are dropped
+MAX_LEARNED = 1 << 20
+
+
+class LayoutMemory:
+    """
+    What earlier searches learned about the states of one layout.
+
+    learned: a lower bound of the distance to the goal of every state, or math.inf for states that
+    can not reach a goal
+    exact: the states on the optimal solutions found so far, mapped to the next state on them
+    """
+
+    def __init__(self):
+        self.learned = {}
+        self.exact = {}
+
+
+class IncrementalSolver:
+    """
+    Solves a puzzle again after small edits, reusing the earlier searches of the same layout.
+
+    Sliding a car along its lane keeps the layout, so only the initial state changes; adding or
+    removing a car or moving it to another lane gives another layout, which is reused when it
+    was solved before. Every search is an A* with an admissible heuristic and updates the memory
+    of its layout in the manner of adaptive A*: a state expanded at depth g in a search of cost C
+    is at least C - g moves away from the goal, which then replaces the heuristic where it is
+    larger, and the states on the solution are known exactly. A later search ends as soon as it
+    pops a state of a known solution and splices the rest of that solution on, so an edit that
+    only disturbs the beginning of the solution repairs just that part. States from which an
+    exhausted search found no goal are pruned in later searches.
+    """
+
+    def __init__(self, heuristic='blockers'):
+        self.heuristic = get_heuristic(heuristic)
+        self.layouts = OrderedDict()
+
+    def memory(self, layout):
+        """returns the memory of a layout, creating it and dropping the oldest one if needed."""
+        memory = self.layouts.pop(layout, None) or LayoutMemory()
+        self.layouts[layout] = memory
+
+        if len(self.layouts) > MAX_LAYOUTS:
+            self.layouts.popitem(last=False)
+
+        return memory
+
+    def solve(self, initial_state, stats=None):
+        """
+        Solves a puzzle with the help of the earlier searches of its layout.
+
+        Parameters:
+        initial_state (GameState): The initial state of the game.
+        stats (SearchStats): Optional counters filled in during the search.
+
+        Returns:
+        tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+        """
+        if initial_state.is_goal():
+            return replay([initial_state])
+
+        memory = self.memory(initial_state.layout)
+        learned, exact = memory.learned, memory.exact
+
+        def heuristic(state):
+            value = self.heuristic(state)
+            return max(value, learned.get(state.positions, value))
+
+        order = itertools.count()
+        depth = {initial_state: 0}
+        parent = {initial_state: None}
+        open_set = [(heuristic(initial_state), 0, next(order), initial_state)]
+        expanded = set()
+        end = None
+
+        while open_set:
+            f, neg_depth, _, state = heapq.heappop(open_set)
+            if -neg_depth > depth[state]:
+                if stats is not None:
+                    stats.stale += 1
+                continue
+
+            # the rest of the way is known, and no other open state can lead to a shorter one
+            if state.is_goal() or state.positions in exact:
+                end = state
+                break
+
+            expanded.add(state)
+            successors = successor_states(state)
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += len(successors)
+
+            new_depth = depth[state] + 1
+            for successor in successors:
+                if depth.get(successor, new_depth + 1) <= new_depth:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+
+                h = heuristic(successor)
+                if h == math.inf:
+                    continue
+
+                depth[successor] = new_depth
+                parent[successor] = state
+                heapq.heappush(open_set, (new_depth + h, -new_depth, next(order), successor))
+
+        if len(learned) > MAX_LEARNED:
+            # the known solutions rely on their exact distances in learned
+            learned.clear()
+            exact.clear()
+
+        if end is None:
+            # every state reached is cut off from the goal
+            for state in depth:
+                learned[state.positions] = math.inf
+            return None
+
+        path = solution_states(parent, end)
+        while not path[-1].is_goal():
+            path.append(GameState.from_layout(initial_state.layout, exact[path[-1].positions]))
+        cost = len(path) - 1
+
+        for state in expanded:
+            bound = cost - depth[state]
+            if bound > learned.get(state.positions, 0):
+                learned[state.positions] = bound
+
+        for distance, (state, next_state) in enumerate(zip(path, path[1:])):
+            exact[state.positions] = next_state.positions
+            learned[state.positions] = cost - distance
+
+        return replay(path)
+
+    def add_car(self, state, car):
+        """adds a car to a puzzle; returns the new initial state and its solution."""
+        return self.edit(state, list(state.cars) + [car])
+
+    def remove_car(self, state, car_idx):
+        """removes a car other than the red one; returns the new initial state and its solution."""
+        if car_idx == 0:
+            raise ValueError("the red car can not be removed")
+
+        cars = list(state.cars)
+        del cars[car_idx]
+        return self.edit(state, cars)
+
+    def move_car(self, state, car_idx, row, col):
+        """places a car on another cell; returns the new initial state and its solution."""
+        cars = list(state.cars)
+        car = cars[car_idx]
+        cars[car_idx] = Car(row, col, car.orientation, car.length)
+        return self.edit(state, cars)
+
+    def edit(self, state, cars):
+        check_cars(cars, state.num_rows, state.num_cols)
+        new_state = GameState(cars, state.num_rows, state.num_cols)
+        return new_state, self.solve(new_state)
+
+
+def check_cars(cars, num_rows, num_cols):
+    """raises ValueError when a car leaves the board or overlaps another one."""
+    taken = set()
+
+    for car_idx, car in enumerate(cars):
+        if car.orientation == 'h':
+            cells = {(car.row, col) for col in range(car.col, car.col + car.length)}
+        else:
+            cells = {(row, car.col) for row in range(car.row, car.row + car.length)}
+
+        if not all(0 <= row < num_rows and 0 <= col < num_cols for row, col in cells):
+            raise ValueError(f"car {car_idx} does not fit on the board")
+        if cells & taken:
+            raise ValueError(f"car {car_idx} overlaps another car")
+        taken |= cells
@@ -0,0 +1,98 @@
+import random
+
+from structure.car import Car
+from structure.move_table import lane_table
+
+# fixed seed, so equal layouts always get the same zobrist keys
+ZOBRIST_SEED = 0x5EED
+
+
+class Layout:
+    """
+    The static part of a puzzle, shared by every state of that puzzle.
+
+    A car never leaves its lane, so its orientation, length and lane (the row of a horizontal car,
+    the column of a vertical one) are stored here once. A state only has to keep the position of
+    each car along its lane: the column of a horizontal car, the row of a vertical one.
+
+    Cars sharing a lane can never pass each other, so their order along the lane is the same in
+    every state reached from a puzzle. Two states that only differ by a swap of identical cars are
+    therefore never both reachable, and the positions need no canonical form within a search.
+    """
+
+    __slots__ = ('num_rows', 'num_cols', 'orientations', 'lengths', 'lanes', 'zobrist', 'row_table', 'col_table')
+
+    def __init__(self, num_rows, num_cols, orientations, lengths, lanes):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.orientations = tuple(orientations)
+        self.lengths = tuple(lengths)
+        self.lanes = tuple(lanes)
+
+        # one random key per car and position; the hash of a state is the xor of the keys of its cars
+        rnd = random.Random(ZOBRIST_SEED)
+        self.zobrist = tuple(tuple(rnd.getrandbits(64) for _ in range(self.lane_size(car_idx)))
+                             for car_idx in range(len(self.orientations)))
+
+        # slide distances by lane occupancy, for the rows (horizontal cars) and the columns (vertical cars)
+        self.row_table = lane_table(num_cols)
+        self.col_table = lane_table(num_rows)
+
+    @classmethod
+    def from_cars(cls, cars, num_rows, num_cols):
+        """
+        splits a list of cars into the shared layout and the positions of the cars.
+        returns a tuple of the layout and the positions.
+        """
+        layout = cls(num_rows, num_cols,
+                     [car.orientation for car in cars],
+                     [car.length for car in cars],
+                     [car.row if car.orientation == 'h' else car.col for car in cars])
+
+        positions = tuple(car.col if car.orientation == 'h' else car.row for car in cars)
+        return layout, positions
+
+    def __eq__(self, other):
+        return isinstance(other, Layout) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __len__(self):
+        return len(self.orientations)
+
+    def key(self):
+        return self.num_rows, self.num_cols, self.orientations, self.lengths, self.lanes
+
+    def lane_size(self, car_idx):
+        """returns the number of cells in the lane of the given car."""
+        return self.num_cols if self.orientations[car_idx] == 'h' else self.num_rows
+
+    def encoding(self):
+        """
+        the encoding of the positions of a state as one integer, a mixed radix number with one digit per
+        car. returns the number of positions of every car along its lane (the radices), the weight of
+        every car's digit (the strides) and the number of configurations, one more than the largest code.
+        """
+        radices = tuple(self.lane_size(car_idx) - self.lengths[car_idx] + 1 for car_idx in range(len(self)))
+
+        strides = []
+        size = 1
+        for radix in radices:
+            strides.append(size)
+            size *= radix
+
+        return radices, tuple(strides), size
+
+    def hash_positions(self, positions):
+        """computes the zobrist hash of the given positions from scratch."""
+        value = 0
+        for keys, position in zip(self.zobrist, positions):
+            value ^= keys[position]
+        return value
+
+    def make_car(self, car_idx, position):
+        """builds the Car object of the given car at the given position."""
+        if self.orientations[car_idx] == 'h':
+            return Car(self.lanes[car_idx], position, 'h', self.lengths[car_idx])
+        return Car(position, self.lanes[car_idx], self.orientations[car_idx], self.lengths[car_idx])
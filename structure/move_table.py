@@ -0,0 +1,51 @@
+# tables built so far, by lane size; every puzzle with lanes of that size shares them
+TABLES = {}
+
+# largest lane with a table; a table holds 2 * size * 2**size entries
+MAX_LANE_SIZE = 12
+
+
+class LaneTable:
+    """
+    Free cells around a car for every occupancy of a lane of one size.
+
+    The occupancy of a lane is a bitmask with bit i set when cell i is taken, as kept in the
+    row_masks and col_masks of a BitBoard, the car's own cells included.
+
+    back[position][mask]: the free cells right before a car whose first cell is position
+    forward[front][mask]: the free cells from front on, for a car whose last cell is front - 1
+    """
+
+    __slots__ = ('size', 'back', 'forward')
+
+    def __init__(self, size):
+        self.size = size
+        masks = range(1 << size)
+
+        self.back = [[free_behind(mask, position) for mask in masks] for position in range(size + 1)]
+        self.forward = [[free_ahead(mask >> front, size - front) for mask in masks] for front in range(size + 1)]
+
+
+def free_behind(mask, position):
+    """returns the number of free cells of a lane right before the given position."""
+    # bit_length() of the taken cells before the position points right after the nearest one
+    return position - (mask & ((1 << position) - 1)).bit_length()
+
+
+def free_ahead(ahead, limit):
+    """returns the number of free cells before the lowest set bit of ahead, or limit if none is set."""
+    if not ahead:
+        return limit
+
+    return (ahead & -ahead).bit_length() - 1
+
+
+def lane_table(size):
+    """returns the LaneTable of lanes of the given size, or None when the lane is too large for one."""
+    if size > MAX_LANE_SIZE:
+        return None
+
+    table = TABLES.get(size)
+    if table is None:
+        table = TABLES[size] = LaneTable(size)
+    return table
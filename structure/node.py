@@ -1,82 +1,52 @@
-from structure.gamestate import GameState
+from structure.bitboard import slides
 
 
 class Node:
-    def __init__(self, state, depth, came_from=None, move=None):
+    __slots__ = ('state', 'depth', 'came_from', 'move', 'h', 'f')
+
+    def __init__(self, state, depth, came_from=None, move=None, heuristic=None):
         self.state = state
         self.depth = depth
         self.came_from = came_from
         self.move = move
 
+        # g (depth), h and f are computed once, the open list compares them many times
+        self.h = heuristic(state) if heuristic else state.heuristic()
+        self.f = depth + self.h
+
     def priority(self):
-        return self.depth + self.state.heuristic()
+        return self.f
 
     def __eq__(self, other):
-        return isinstance(other, Node) and self.state == other.state and self.priority() == other.priority()
+        return isinstance(other, Node) and self.state == other.state and self.f == other.f
 
     def __lt__(self, other):
-        return self.priority() < other.priority()
+        return self.f < other.f
 
-    def generate_successor(self):
+    def generate_successor(self, heuristic=None):
         successors = []
+        state = self.state
 
-        for car in self.state.cars:
-
-            car_idx = self.state.cars.index(car)
-
-            # move up if not blocked
-            if car.orientation == 'v':
-                blocked_dirs = self.state.blocked_directions(car)
-
-                if 'u' not in blocked_dirs:
-                    moves = GameState.max_up(self.state, car)
-
-                    if moves > 0:
-                        new_state_up = self.state.go_up(car, moves)
-
-                        if new_state_up:
-                            move = f"Car {car_idx} at ({car.row}, {car.col}) moved up {moves} spaces."
-                            successors.append(Node(new_state_up, self.depth + 1, self, move))
-
-                # move down if not blocked
-                if 'd' not in blocked_dirs:
-                    moves = GameState.max_down(self.state, car)
-                    if moves > 0:
-                        new_state_down = self.state.go_down(car, moves)
-                        if new_state_down:
-                            move = f"Car {car_idx} at ({car.row}, {car.col}) moved down {moves} spaces."
-                            successors.append(Node(new_state_down, self.depth + 1, self, move))
-
-            elif car.orientation == 'h':
-                blocked_dirs = self.state.blocked_directions(car)
-
-                # move left if not blocked
-                if 'l' not in blocked_dirs:
-                    moves = GameState.max_left(self.state, car)
-                    if moves > 0:
-                        new_state_left = self.state.go_left(car, moves)
-                        if new_state_left:
-                            move = f"Car {car_idx} at ({car.row}, {car.col}) moved left {moves} spaces."
-                            successors.append(Node(new_state_left, self.depth + 1, self, move))
-
-                # move right if not blocked
-                if 'r' not in blocked_dirs:
-                    moves = GameState.max_right(self.state, car)
-                    if moves > 0:
-                        new_state_right = self.state.go_right(car, moves)
-                        if new_state_right:
-                            move = f"Car {car_idx} at ({car.row}, {car.col}) moved right {moves} spaces."
-                            successors.append(Node(new_state_right, self.depth + 1, self, move))
+        # moves are kept as the compact (car index, signed distance) records of slides();
+        # they are only turned into text by reconstruct_path
+        for move in slides(state.layout, state.positions):
+            car_idx, distance = move
+            successors.append(Node(state.move(car_idx, distance), self.depth + 1, self, move, heuristic))
 
         return successors
 
-    def reconstruct_path(self):
+    def reconstruct_path(self, formatter=None):
         """
         Reconstructs the path from the initial state to the current state.
 
+        Parameters:
+        formatter (callable): Turns the state before a move and the move record into the returned move;
+        format_move by default.
+
         Returns:
         tuple: A tuple containing the path of states and the moves taken.
         """
+        formatter = formatter or format_move
 
         path = []
         moves = []
@@ -84,10 +54,28 @@ class Node:
 
         while current:
             path.append(current.state)
-            moves.append(current.move)
+            if current.came_from is None:
+                moves.append(None)
+            else:
+                moves.append(formatter(current.came_from.state, current.move))
             # move to the previous node in the path
             current = current.came_from
 
         path.reverse()
         moves.reverse()
         return path, moves
+
+
+def format_move(state, move):
+    """describes a (car index, signed distance) move made from the given state."""
+    car_idx, distance = move
+    layout = state.layout
+    position = state.positions[car_idx]
+    lane = layout.lanes[car_idx]
+
+    if layout.orientations[car_idx] == 'v':
+        direction = 'up' if distance < 0 else 'down'
+        return f"Car {car_idx} at ({position}, {lane}) moved {direction} {abs(distance)} spaces."
+
+    direction = 'left' if distance < 0 else 'right'
+    return f"Car {car_idx} at ({lane}, {position}) moved {direction} {abs(distance)} spaces."
@@ -0,0 +1,76 @@
+import heapq
+
+
+class HeapQueue:
+    """binary heap open list ordered by Node.__lt__, i.e. by f value."""
+
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, node):
+        heapq.heappush(self.heap, node)
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+
+class BucketQueue:
+    """
+    Open list keyed by the integer f value of the nodes.
+
+    buckets[f][g] is a stack of the nodes with that f and g (depth). Pushing is O(1) and popping only
+    walks over empty buckets. Among the nodes with the lowest f, the deepest one is popped first,
+    which leads straight down to a goal when many nodes tie on f.
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.size = 0
+        self.min_f = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, node):
+        f, g = node.f, node.depth
+
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+
+        bucket = self.buckets[f]
+        while len(bucket) <= g:
+            bucket.append([])
+
+        bucket[g].append(node)
+        self.size += 1
+
+        # f is not monotone along a path when the heuristic is not consistent
+        if f < self.min_f or self.size == 1:
+            self.min_f = f
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty bucket queue")
+
+        # skip the empty buckets; a bucket never keeps empty stacks at its end
+        while not self.buckets[self.min_f]:
+            self.min_f += 1
+
+        bucket = self.buckets[self.min_f]
+        node = bucket[-1].pop()
+
+        while bucket and not bucket[-1]:
+            bucket.pop()
+
+        self.size -= 1
+        return node
+
+
+# open list implementations selectable by name in a_star
+OPEN_LISTS = {
+    'heap': HeapQueue,
+    'bucket': BucketQueue,
+}
@@ -0,0 +1,205 @@
+import heapq
+import os
+import queue
+import time
+from multiprocessing import Array, Process, Queue, Value
+
+from structure.bitboard import slides
+from structure.gamestate import GameState
+from structure.heuristics import get_heuristic
+from structure.search import replay
+
+# states sent to another worker in one message
+BATCH_SIZE = 64
+
+# incumbent cost while no goal has been found
+NO_SOLUTION = 1 << 62
+
+
+def hda_star(initial_state, workers=None, heuristic='blockers', batch_size=BATCH_SIZE):
+    """
+    Performs hash distributed A* on several processes.
+
+    Every state is owned by one worker, chosen by its zobrist hash. A worker runs A* on its own open
+    list and closed set and sends the successors it does not own to their owners in batches. The
+    cheapest goal found so far (the incumbent) is shared, and nodes whose f is not below it are
+    dropped. The search ends when every worker is idle and every message sent has been received;
+    with an admissible heuristic the incumbent is then optimal.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+    workers (int): Number of worker processes, the number of CPUs by default.
+    heuristic (str): A name from HEURISTICS; it has to be admissible for the solution to be optimal.
+    batch_size (int): States sent to another worker in one message.
+
+    Returns:
+    tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+    """
+    if initial_state.is_goal():
+        return replay([initial_state])
+
+    layout = initial_state.layout
+    num_workers = workers or os.cpu_count() or 1
+
+    inboxes = [Queue() for _ in range(num_workers)]
+    results = Queue()
+
+    # message counters, one slot per sender or receiver; the last sent slot is this process
+    sent = Array('q', num_workers + 1, lock=False)
+    received = Array('q', num_workers, lock=False)
+    idle = Array('b', num_workers, lock=False)
+    incumbent = Value('q', NO_SOLUTION)
+
+    processes = [Process(target=hda_worker, daemon=True,
+                         args=(index, layout, heuristic, inboxes, results, sent, received, idle,
+                               incumbent, batch_size))
+                 for index in range(num_workers)]
+    for process in processes:
+        process.start()
+
+    sent[num_workers] += 1
+    inboxes[hash(initial_state) % num_workers].put(('states', [(0, initial_state.positions, None)]))
+
+    goal = None
+    try:
+        while True:
+            goal = collect_goal(results, goal)
+
+            # nothing can happen any more when every worker is idle and no message is on its way;
+            # the counters are read around the idle flags so no message slips in between
+            before = sum(sent), sum(received)
+            all_idle = all(idle)
+            after = sum(sent), sum(received)
+
+            if all_idle and before == after and after[0] == after[1]:
+                break
+
+            time.sleep(0.001)
+
+        goal = collect_goal(results, goal)
+        if goal is None:
+            return None
+
+        # follow the parents back from the goal, asking the owner of every state
+        path = [goal[1]]
+        while True:
+            positions = path[-1]
+            owner = hash(GameState.from_layout(layout, positions)) % num_workers
+            inboxes[owner].put(('parent', positions))
+
+            message = results.get()
+            while message[0] != 'parent':
+                message = results.get()
+
+            if message[2] is None:
+                break
+            path.append(message[2])
+
+        return replay([GameState.from_layout(layout, positions) for positions in reversed(path)])
+
+    finally:
+        for inbox in inboxes:
+            inbox.put(('exit',))
+        for process in processes:
+            process.join()
+
+
+def collect_goal(results, goal):
+    """returns the cheapest of the given goal and the goals reported so far, as (cost, positions)."""
+    while True:
+        try:
+            message = results.get_nowait()
+        except queue.Empty:
+            return goal
+
+        if message[0] == 'goal' and (goal is None or message[1] < goal[0]):
+            goal = message[1:]
+
+
+def hda_worker(index, layout, heuristic, inboxes, results, sent, received, idle, incumbent, batch_size):
+    """the A* search of one worker of hda_star, on the states it owns."""
+    heuristic = get_heuristic(heuristic)
+    num_workers = len(inboxes)
+    inbox = inboxes[index]
+
+    # f, -g and positions; deeper nodes first among equal f
+    open_list = []
+
+    # lowest g and parent positions of every state reached
+    best = {}
+
+    # successors waiting to be sent to each worker
+    outboxes = [[] for _ in range(num_workers)]
+
+    def send(owner):
+        sent[index] += 1
+        inboxes[owner].put(('states', outboxes[owner]))
+        outboxes[owner] = []
+
+    def add(g, positions, parent):
+        old = best.get(positions)
+        if old is not None and old[0] <= g:
+            return
+
+        f = g + heuristic(GameState.from_layout(layout, positions))
+        if f >= incumbent.value:
+            return
+
+        best[positions] = (g, parent)
+        heapq.heappush(open_list, (f, -g, positions))
+
+    while True:
+        has_work = open_list and open_list[0][0] < incumbent.value
+
+        try:
+            message = inbox.get_nowait() if has_work else inbox.get(timeout=0.01)
+        except queue.Empty:
+            message = None
+
+        if message is not None:
+            if message[0] == 'exit':
+                return
+
+            if message[0] == 'parent':
+                results.put(('parent', message[1], best[message[1]][1]))
+                continue
+
+            idle[index] = 0
+            for g, positions, parent in message[1]:
+                add(g, positions, parent)
+            # counted only once the states are in the open list
+            received[index] += 1
+            continue
+
+        if not has_work:
+            # hand out what is left before going idle
+            for owner in range(num_workers):
+                if outboxes[owner]:
+                    send(owner)
+            idle[index] = 1
+            continue
+
+        f, neg_g, positions = heapq.heappop(open_list)
+        g = -neg_g
+        if best[positions][0] < g:
+            # stale entry
+            continue
+
+        state = GameState.from_layout(layout, positions)
+        if state.is_goal():
+            with incumbent.get_lock():
+                if g < incumbent.value:
+                    incumbent.value = g
+                    results.put(('goal', g, positions))
+            continue
+
+        for car_idx, distance in slides(layout, positions):
+            child = state.move(car_idx, distance)
+            owner = hash(child) % num_workers
+
+            if owner == index:
+                add(g + 1, child.positions, positions)
+            else:
+                outboxes[owner].append((g + 1, child.positions, positions))
+                if len(outboxes[owner]) >= batch_size:
+                    send(owner)
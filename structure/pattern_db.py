@@ -0,0 +1,228 @@
+"""
+Pattern databases: the exact distance to the goal of every configuration of one layout, so that
+any number of puzzles sharing that layout are solved without a search.
+
+The database of the layout of one test of the input, the first one by default, is built ahead of
+time and saved for main.py --pattern-db OUTPUT.
+
+usage: python -m structure.pattern_db build OUTPUT [--input FILE] [--test N]
+"""
+import argparse
+import json
+import mmap
+import time
+
+from structure.bitboard import reverse_slides
+from structure.gamestate import GameState
+from structure.get_inp import get_data
+from structure.layout import Layout
+from structure.node import Node
+
+# distance value of configurations from which no goal can be reached
+UNREACHABLE = 255
+
+# largest index space a pattern database is built for, one byte per configuration
+MAX_ENTRIES = 1 << 28
+
+
+class PatternDatabase:
+    """
+    Exact distance to the goal of every configuration of one layout.
+
+    The table is filled by a retrograde breadth-first search that starts from every goal
+    configuration and walks the moves backwards. Configurations are indexed by a perfect hash
+    of the car positions (a mixed radix number with one digit per car), so the distances fit in
+    one byte per possible configuration.
+    """
+
+    def __init__(self, layout, distances):
+        self.layout = layout
+        self.distances = distances
+
+        # number of positions each car can take along its lane and the weight of its digit in the index
+        self.radices, self.strides, size = layout.encoding()
+
+    @classmethod
+    def build(cls, layout, max_entries=MAX_ENTRIES):
+        """runs the retrograde search for the given layout and returns the filled database."""
+        radices, strides, size = layout.encoding()
+        if size > max_entries:
+            raise ValueError(f"layout has {size} configurations, more than the limit of {max_entries}")
+
+        db = cls(layout, bytearray([UNREACHABLE]) * size)
+
+        frontier = []
+        for positions in goal_configurations(layout):
+            db.distances[db.index(positions)] = 0
+            frontier.append(positions)
+
+        distance = 0
+        while frontier:
+            distance += 1
+            if distance >= UNREACHABLE:
+                raise ValueError(f"layout has configurations more than {UNREACHABLE - 1} moves from the goal")
+
+            next_frontier = []
+            for positions in frontier:
+                for car_idx, delta in reverse_slides(layout, positions):
+                    previous = positions[:car_idx] + (positions[car_idx] - delta,) + positions[car_idx + 1:]
+                    index = db.index(previous)
+
+                    if db.distances[index] == UNREACHABLE:
+                        db.distances[index] = distance
+                        next_frontier.append(previous)
+
+            frontier = next_frontier
+
+        return db
+
+    def index(self, positions):
+        """perfect hash of the positions of the cars."""
+        return sum(position * stride for position, stride in zip(positions, self.strides))
+
+    def covers(self, state):
+        return state.layout == self.layout
+
+    def distance(self, state):
+        """returns the number of moves from the given state to the goal, or None if it is unsolvable."""
+        distance = self.distances[self.index(state.positions)]
+        return None if distance == UNREACHABLE else distance
+
+    def solve(self, initial_state):
+        """
+        Follows the distances down to a goal, without any search.
+
+        Returns:
+        tuple: The path of states and the moves taken, like a_star, or None if the state is unsolvable.
+        """
+        distance = self.distance(initial_state)
+        if distance is None:
+            return None
+
+        current = Node(initial_state, 0)
+
+        while distance > 0:
+            # any successor one move closer to the goal lies on an optimal path
+            for successor in current.generate_successor():
+                if self.distances[self.index(successor.state.positions)] == distance - 1:
+                    current = successor
+                    break
+
+            distance -= 1
+
+        return current.reconstruct_path()
+
+    def save(self, path):
+        """writes the database to a file: a json header line followed by the raw distances."""
+        header = {
+            'num_rows': self.layout.num_rows,
+            'num_cols': self.layout.num_cols,
+            'orientations': self.layout.orientations,
+            'lengths': self.layout.lengths,
+            'lanes': self.layout.lanes,
+        }
+
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header).encode() + b'\n')
+            f.write(self.distances)
+
+    @classmethod
+    def load(cls, path):
+        """
+        reads a database written by save(). The distances are memory mapped, so processes that load
+        the same file share its pages.
+        """
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            offset = f.tell()
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        layout = Layout(header['num_rows'], header['num_cols'],
+                        header['orientations'], header['lengths'], header['lanes'])
+        return cls(layout, memoryview(data)[offset:])
+
+
+def goal_configurations(layout, order=()):
+    """
+    generates the positions of every valid configuration of the layout that satisfies is_goal.
+    order holds (car, other car) index pairs of cars that must come first, at a lower position.
+    """
+    num_cars = len(layout)
+
+    # the pairs are checked when the second of both cars is placed
+    before = [[] for _ in range(num_cars)]
+    after = [[] for _ in range(num_cars)]
+    for first, second in order:
+        if first < second:
+            before[second].append(first)
+        else:
+            after[first].append(second)
+
+    # cells of every car at every position, as bitmasks over the whole grid
+    cells = []
+    for car_idx in range(num_cars):
+        lane, length = layout.lanes[car_idx], layout.lengths[car_idx]
+        masks = []
+        for position in range(layout.lane_size(car_idx) - length + 1):
+            if layout.orientations[car_idx] == 'h':
+                mask = ((1 << length) - 1) << (lane * layout.num_cols + position)
+            else:
+                mask = 0
+                for row in range(position, position + length):
+                    mask |= 1 << (row * layout.num_cols + lane)
+            masks.append(mask)
+        cells.append(masks)
+
+    # the red car is the only one restricted by the goal
+    red_positions = [position for position in range(len(cells[0]))
+                     if GameState.from_layout(layout, (position,) + (0,) * (num_cars - 1), 0).is_goal()]
+
+    positions = [0] * num_cars
+
+    def place(car_idx, occupied):
+        if car_idx == num_cars:
+            yield tuple(positions)
+            return
+
+        candidates = red_positions if car_idx == 0 else range(len(cells[car_idx]))
+        for position in candidates:
+            mask = cells[car_idx][position]
+            if mask & occupied:
+                continue
+            if any(positions[other] >= position for other in before[car_idx]):
+                continue
+            if any(positions[other] <= position for other in after[car_idx]):
+                continue
+
+            positions[car_idx] = position
+            yield from place(car_idx + 1, occupied | mask)
+
+    yield from place(0, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputes pattern databases for main.py --pattern-db.")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('output', help="file the database is written to")
+    parser.add_argument('--input', help="read the tests from this file instead of the standard input")
+    parser.add_argument('--test', type=int, default=1, help="test whose layout the database is built for")
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES,
+                        help="largest number of configurations of the layout")
+    args = parser.parse_args()
+
+    for i, (cars, rows, columns) in enumerate(get_data(args.input)):
+        if i + 1 == args.test:
+            break
+    else:
+        parser.error(f"the input has no test #{args.test}")
+
+    start = time.perf_counter()
+    db = PatternDatabase.build(GameState(cars, rows, columns).layout, args.max_entries)
+    db.save(args.output)
+
+    print(f"wrote {len(db.distances)} configurations to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+def unsolvable(state):
+    """
+    Looks for simple reasons why no sequence of moves leads from the given state to a goal,
+    without searching. Only proofs are reported; a puzzle that passes may still be unsolvable.
+
+    Returns:
+    str: Why the puzzle can not be solved, or None if no reason was found.
+    """
+    if state.is_goal():
+        return None
+
+    layout = state.layout
+
+    if layout.orientations[0] == 'v':
+        # a vertical red car only reaches the goal in the first column, and it never changes column
+        return "the vertical red car is not in the first column"
+
+    red_row = layout.lanes[0]
+    red_position = state.positions[0]
+    red_front = red_position + layout.lengths[0]
+
+    # horizontal cars ahead of the red car stay ahead of it, so they have to fit between it and the
+    # right edge while its front reaches the second to last column
+    ahead = sum(layout.lengths[car_idx] for car_idx in range(1, len(layout))
+                if layout.orientations[car_idx] == 'h' and layout.lanes[car_idx] == red_row
+                and state.positions[car_idx] > red_position)
+    if ahead > 1:
+        return f"horizontal cars of total length {ahead} are ahead of the red car in its row"
+
+    for car_idx in range(1, len(layout)):
+        if layout.orientations[car_idx] != 'v' or not red_front <= layout.lanes[car_idx] <= layout.num_cols - 2:
+            continue
+
+        # a vertical car on the way covers the red car's row wherever it stands in its column
+        length = layout.lengths[car_idx]
+        if layout.num_rows - length <= red_row < length:
+            return f"car {car_idx} blocks the red car's row in every position"
+
+    return None
@@ -1,43 +1,354 @@
 import heapq
+import itertools
+import time
+
+from structure.bitboard import slides
+from structure.closed_set import CLOSED_SETS
+from structure.heuristics import get_heuristic
 from structure.node import Node
+from structure.open_list import OPEN_LISTS
 
 
-def a_star(initial_state):
+def a_star(initial_state, open_list='heap', pattern_db=None, heuristic='blocking', stats=None, closed_set='dict'):
     """
     Performs the A* search algorithm to find the shortest path to the goal state.
 
     Parameters:
     initial_state (GameState): The initial state of the game.
+    open_list (str): The open list to use, one of OPEN_LISTS: 'heap' (binary heap) or
+    'bucket' (integer f buckets, ties broken on the larger depth).
+    pattern_db (PatternDatabase): Optional precomputed distances; when it covers the layout of the
+    initial state, the solution is read from it instead of searching.
+    heuristic (str or callable): A name from HEURISTICS or a function of a GameState.
+    stats (SearchStats): Optional counters and timers filled in during the search.
+    closed_set (str): How the depth of the visited states is kept, one of CLOSED_SETS: 'dict' or
+    'packed' (packed integers in an open addressing table, much smaller on large searches).
 
     Returns:
     list: The path to the goal state if found, otherwise None.
     """
 
+    if pattern_db is not None and pattern_db.covers(initial_state):
+        return pattern_db.solve(initial_state)
+
+    heuristic = get_heuristic(heuristic)
+    if stats is not None:
+        heuristic = stats.timed(heuristic)
+
     # initialize the priority queue with the starting node
-    start_node = Node(initial_state, 0)
-    open_set = []
-    heapq.heappush(open_set, start_node)
+    start_node = Node(initial_state, 0, heuristic=heuristic)
+    open_set = OPEN_LISTS[open_list]()
+    open_set.push(start_node)
 
-    # use a dictionary to track the lowest cost to each visited state
-    visited = {}
+    # track the lowest cost to each visited state
+    visited = CLOSED_SETS[closed_set](initial_state.layout)
 
     while open_set:
         # get the node with the lowest cost from the priority queue
-        current_node = heapq.heappop(open_set)
+        if stats is None:
+            current_node = open_set.pop()
+        else:
+            start = time.perf_counter()
+            current_node = open_set.pop()
+            stats.open_list_time += time.perf_counter() - start
 
         # check if the current state is the goal state
         if current_node.state.is_goal():
             return current_node.reconstruct_path()
 
+        # entries of states already expanded at a lower or equal depth are stale, skip them
+        if visited.get(current_node.state, current_node.depth + 1) <= current_node.depth:
+            if stats is not None:
+                stats.stale += 1
+            continue
+
         # update the visited dictionary with the current node
-        if current_node.state not in visited or visited[current_node.state] > current_node.depth:
-            visited[current_node.state] = current_node.depth
+        visited[current_node.state] = current_node.depth
+
+        # generate successors for the current state
+        if stats is None:
+            successors = current_node.generate_successor(heuristic)
+        else:
+            heuristic_time = stats.heuristic_time
+            start = time.perf_counter()
+            successors = current_node.generate_successor(heuristic)
+            stats.successor_time += time.perf_counter() - start - (stats.heuristic_time - heuristic_time)
 
-            # generate successors for the current state
-            for successor in current_node.generate_successor():
-                new_cost = successor.depth
-                if successor.state not in visited or visited[successor.state] > new_cost:
-                    heapq.heappush(open_set, successor)
+            stats.expanded += 1
+            stats.generated += len(successors)
+            stats.peak_visited = max(stats.peak_visited, len(visited))
+            start = time.perf_counter()
+
+        for successor in successors:
+            new_cost = successor.depth
+            if visited.get(successor.state, new_cost + 1) > new_cost:
+                open_set.push(successor)
+            elif stats is not None:
+                stats.duplicates += 1
+
+        if stats is not None:
+            stats.open_list_time += time.perf_counter() - start
+            stats.peak_open = max(stats.peak_open, len(open_set))
 
     # if no solution is found
     return None
+
+
+# default number of states kept in the transposition table of ida_star
+TABLE_SIZE = 1_000_000
+
+
+def ida_star(initial_state, heuristic='blockers', table_size=TABLE_SIZE, stats=None):
+    """
+    Performs iterative deepening A*: depth first searches bounded by f, raising the bound to the
+    smallest f that exceeded it until a goal is found. Memory stays bounded by the depth of the
+    search plus a transposition table of at most table_size states, which only prunes states
+    already reached at a lower or equal depth in the same iteration. While the table holds every
+    state of an iteration, it also proves a puzzle unsolvable once no new state is left to reach.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+    heuristic (str or callable): A name from HEURISTICS or a function of a GameState; it has to be
+    admissible for the solution to be optimal.
+    table_size (int): The maximum number of states in the transposition table.
+    stats (SearchStats): Optional counters filled in during the search; peak_visited is the
+    largest size of the transposition table.
+
+    Returns:
+    tuple: The path of states and the moves taken, like a_star, or None if there is no solution.
+    """
+    heuristic = get_heuristic(heuristic)
+    if stats is not None:
+        heuristic = stats.timed(heuristic)
+
+    if initial_state.is_goal():
+        return Node(initial_state, 0).reconstruct_path()
+
+    bound = heuristic(initial_state)
+
+    while True:
+        # lowest depth of each state in this iteration, as long as it fits in the table
+        table = {initial_state: 0}
+        next_bound = None
+
+        # states cut off by the bound; when all of them were reached within the bound anyway,
+        # raising it can not lead anywhere new
+        cut_off = set()
+        complete = True
+
+        path = [initial_state]
+        on_path = {initial_state}
+        stack = [iter(successor_states(initial_state))]
+
+        while stack:
+            state = next(stack[-1], None)
+
+            if state is None:
+                # every successor of the last state on the path is done, backtrack
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+
+            depth = len(path)
+            if state in on_path or table.get(state, depth + 1) <= depth:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+
+            f = depth + heuristic(state)
+            if f > bound:
+                if next_bound is None or f < next_bound:
+                    next_bound = f
+                if len(cut_off) < table_size:
+                    cut_off.add(state)
+                else:
+                    complete = False
+                continue
+
+            if state.is_goal():
+                path.append(state)
+                return replay(path)
+
+            if len(table) < table_size:
+                table[state] = depth
+            else:
+                complete = False
+
+            path.append(state)
+            on_path.add(state)
+
+            if stats is None:
+                stack.append(iter(successor_states(state)))
+            else:
+                start = time.perf_counter()
+                successors = successor_states(state)
+                stats.successor_time += time.perf_counter() - start
+
+                stats.expanded += 1
+                stats.generated += len(successors)
+                stats.peak_visited = max(stats.peak_visited, len(table))
+                stack.append(iter(successors))
+
+        if next_bound is None or (complete and cut_off.issubset(table)):
+            # the whole reachable space has been searched
+            return None
+
+        bound = next_bound
+
+
+def successor_states(state):
+    return [state.move(car_idx, distance) for car_idx, distance in slides(state.layout, state.positions)]
+
+
+def replay(states):
+    """
+    rebuilds the Node chain along a list of consecutive states.
+    returns the path and the moves taken, as Node.reconstruct_path does.
+    """
+    node = Node(states[0], 0)
+
+    for state in states[1:]:
+        node = next(successor for successor in node.generate_successor() if successor.state == state)
+
+    return node.reconstruct_path()
+
+
+# initial weight of the heuristic in ara_star and how much it is lowered after every solution
+WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+
+
+def ara_star(initial_state, deadline=None, heuristic='blockers', weight=WEIGHT, weight_step=WEIGHT_STEP,
+             on_solution=None, stats=None):
+    """
+    Performs anytime repairing A*: a weighted A* that finds a first solution quickly and keeps
+    improving it, lowering the weight of the heuristic after every search and reusing the work of
+    the searches before. States whose depth drops after they were expanded wait in an inconsistent
+    list until the next search. Every solution comes with a proven suboptimality factor, its
+    length divided by the lowest g + h among the states not yet expanded. The search stops at the
+    deadline or once the factor reaches 1.
+
+    Parameters:
+    initial_state (GameState): The initial state of the game.
+    deadline (float): time.perf_counter() value at which the best solution so far is returned;
+    None searches until the solution is proven optimal.
+    heuristic (str or callable): A name from HEURISTICS or a function of a GameState; it has to be
+    admissible for the factor to hold.
+    weight (float): The weight of the heuristic in the first search.
+    weight_step (float): How much the weight is lowered after every search, down to 1.
+    on_solution (callable): Called with the solution and its factor every time the solution or
+    its factor improves.
+    stats (SearchStats): Optional counters filled in during the search.
+
+    Returns:
+    tuple: The best solution found (the path of states and the moves taken, like a_star, or None)
+    and its suboptimality factor; both are None when no solution was found, by the deadline or at all.
+    """
+    heuristic = get_heuristic(heuristic)
+    if stats is not None:
+        heuristic = stats.timed(heuristic)
+
+    if initial_state.is_goal():
+        return Node(initial_state, 0).reconstruct_path(), 1.0
+
+    h = {initial_state: heuristic(initial_state)}
+    depth = {initial_state: 0}
+    parent = {initial_state: None}
+
+    # entries are (g + weight * h, -g, insertion order, state); deeper states first among equal keys
+    order = itertools.count()
+    open_set = [(weight * h[initial_state], 0, next(order), initial_state)]
+    closed = set()
+    inconsistent = set()
+
+    # the best goal state reached and its depth
+    goal = None
+    cost = float('inf')
+
+    solution = None
+    solution_cost = None
+    factor = None
+
+    while True:
+        # weighted A* until no open state can lead to a shorter solution
+        while open_set and open_set[0][0] < cost:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return solution, factor
+
+            key, neg_depth, _, state = heapq.heappop(open_set)
+            if state in closed or -neg_depth > depth[state]:
+                if stats is not None:
+                    stats.stale += 1
+                continue
+            closed.add(state)
+
+            successors = successor_states(state)
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += len(successors)
+                stats.peak_open = max(stats.peak_open, len(open_set))
+                stats.peak_visited = max(stats.peak_visited, len(depth))
+
+            new_depth = depth[state] + 1
+            for successor in successors:
+                if depth.get(successor, new_depth + 1) <= new_depth:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+
+                depth[successor] = new_depth
+                parent[successor] = state
+
+                if successor.is_goal():
+                    if new_depth < cost:
+                        goal, cost = successor, new_depth
+                elif successor in closed:
+                    inconsistent.add(successor)
+                else:
+                    if successor not in h:
+                        h[successor] = heuristic(successor)
+                    heapq.heappush(open_set, (new_depth + weight * h[successor], -new_depth, next(order), successor))
+
+        if goal is not None:
+            # the optimal length is at least the lowest g + h among the states left to expand
+            pending = [-neg_depth + h[state] for key, neg_depth, _, state in open_set
+                       if state not in closed and -neg_depth == depth[state]]
+            pending += [depth[state] + h[state] for state in inconsistent]
+            lower_bound = min(pending, default=cost)
+            new_factor = min(weight, cost / lower_bound) if lower_bound < cost else 1.0
+
+            if solution is None or solution_cost > cost or new_factor < factor:
+                if solution is None or solution_cost > cost:
+                    solution = replay(solution_states(parent, goal))
+                    solution_cost = cost
+                factor = new_factor
+                if on_solution is not None:
+                    on_solution(solution, factor)
+
+            if factor <= 1.0:
+                return solution, factor
+
+        elif not open_set and not inconsistent:
+            # every reachable state has been expanded
+            return None, None
+
+        # repair: lower the weight and expand the inconsistent states again
+        weight = max(1.0, weight - weight_step)
+        entries = [(depth[state], state) for key, neg_depth, _, state in open_set
+                   if state not in closed and -neg_depth == depth[state]]
+        entries += [(depth[state], state) for state in inconsistent]
+        open_set = [(g + weight * h[state], -g, next(order), state) for g, state in entries]
+        heapq.heapify(open_set)
+        closed = set()
+        inconsistent = set()
+
+
+def solution_states(parent, goal):
+    """returns the states from the initial one to the goal, following the parents."""
+    states = []
+    state = goal
+    while state is not None:
+        states.append(state)
+        state = parent[state]
+
+    return states[::-1]
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import signal
+import time
+from multiprocessing import Pool
+
+from structure.batch import TIMED_OUT, solve_task, store
+from structure.cache import MISSING
+from structure.car import Car
+from structure.gamestate import GameState
+from structure.get_inp import parse_tests
+from structure.incremental import check_cars
+
+# largest request body accepted, in bytes
+MAX_BODY = 16 * 1024 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+class BadRequest(Exception):
+    """raised while reading a request that can not be answered; carries the http status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class SolverServer:
+    """
+    Long running solver answering http requests on a local tcp port or a unix socket.
+
+    The worker processes and the solution cache live as long as the server, so requests pay
+    neither the start of the interpreter nor the search of puzzles that were solved before.
+    Puzzles of concurrent requests share one pool of workers.
+
+    POST /solve takes puzzles as json, {"puzzles": [{"rows": 6, "cols": 6, "cars": [[row, col,
+    orientation, length], ...]}], "timeout": seconds} with rows and columns counted from 1 like the
+    text input, or as the text input itself. It answers {"results": [...]} with one
+    {"status": "solved", "length": n, "moves": [[car index, signed distance], ...]},
+    {"status": "unsolvable"}, {"status": "timeout"} or {"status": "error", "error": message} per
+    puzzle, in order. Requests with a puzzle that does not fit its board are answered with 400.
+
+    GET /metrics answers the counters of the server as json.
+    """
+
+    def __init__(self, solver, workers=None, timeout=None, max_tasks_per_child=None, cache=None):
+        self.solver = solver
+        self.workers = workers
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.cache = cache
+        self.pool = None
+
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.puzzles = 0
+        self.in_flight = 0
+        self.solved = 0
+        self.unsolvable = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.solve_time = 0.0
+
+    def serve(self, host='127.0.0.1', port=8765, path=None):
+        """runs the server until it is interrupted; listens on the unix socket path if one is given."""
+        try:
+            asyncio.run(self.run(host, port, path))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        finally:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    async def run(self, host, port, path):
+        # stop cleanly on SIGTERM as well as on ctrl-c
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+        with Pool(processes=self.workers, maxtasksperchild=self.max_tasks_per_child) as self.pool:
+            if path is not None:
+                server = await asyncio.start_unix_server(self.handle, path)
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+
+            async with server:
+                await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        self.requests += 1
+
+        try:
+            method, target, headers, body = await read_request(reader)
+
+            if target == '/solve':
+                if method != 'POST':
+                    raise BadRequest("use POST to solve puzzles", 405)
+                status, payload = 200, await self.answer(headers, body)
+
+            elif target == '/metrics':
+                if method != 'GET':
+                    raise BadRequest("use GET to read the metrics", 405)
+                status, payload = 200, self.metrics()
+
+            else:
+                raise BadRequest(f"unknown path {target}", 404)
+
+        except BadRequest as error:
+            self.errors += 1
+            status, payload = error.status, {'error': str(error)}
+
+        data = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, headers, body):
+        """solves the puzzles of a /solve request and returns the response."""
+        timeout = self.timeout
+
+        try:
+            if 'json' in headers.get('content-type', ''):
+                request = json.loads(body)
+                if request.get('timeout') is not None:
+                    timeout = float(request['timeout'])
+                    if not timeout > 0:
+                        raise ValueError(f"the timeout has to be positive, not {timeout}")
+                puzzles = [([Car(row - 1, col - 1, orientation, length)
+                             for row, col, orientation, length in puzzle['cars']], puzzle['rows'], puzzle['cols'])
+                           for puzzle in request['puzzles']]
+            else:
+                puzzles = list(parse_tests(iter(body.split())))
+
+            for cars, rows, columns in puzzles:
+                check_puzzle(cars, rows, columns)
+
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            raise BadRequest(f"can not read the puzzles: {error!r}")
+
+        results = await asyncio.gather(*(self.solve(puzzle, timeout) for puzzle in puzzles))
+        return {'results': [describe(moves) for moves in results]}
+
+    async def solve(self, puzzle, timeout):
+        """solves one puzzle on the pool, unless the cache knows it; returns its moves like solve_task."""
+        self.puzzles += 1
+        state = GameState(*puzzle)
+
+        moves = self.cache.get(state, MISSING) if self.cache is not None else MISSING
+        if moves is MISSING:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            def resolve(method, value):
+                # the request may have been dropped in the meantime
+                if not future.done():
+                    method(value)
+
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                self.pool.apply_async(
+                    solve_task, ((self.solver, puzzle, timeout),),
+                    callback=lambda result: loop.call_soon_threadsafe(resolve, future.set_result, result),
+                    error_callback=lambda error: loop.call_soon_threadsafe(resolve, future.set_exception, error))
+                moves = await future
+            except Exception as error:
+                # the worker failed on this puzzle; the other puzzles of the request are still answered
+                self.failed += 1
+                return error
+            finally:
+                self.in_flight -= 1
+                self.solve_time += time.perf_counter() - start
+
+            if self.cache is not None:
+                store(self.cache, state, moves)
+
+        if moves == TIMED_OUT:
+            self.timed_out += 1
+        elif moves is None:
+            self.unsolvable += 1
+        else:
+            self.solved += 1
+
+        return moves
+
+    def metrics(self):
+        metrics = {
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+            'errors': self.errors,
+            'puzzles': self.puzzles,
+            'in_flight': self.in_flight,
+            'solved': self.solved,
+            'unsolvable': self.unsolvable,
+            'timed_out': self.timed_out,
+            'failed': self.failed,
+            'solve_time': self.solve_time,
+        }
+
+        if self.cache is not None:
+            metrics.update(cache_hits=self.cache.hits, cache_misses=self.cache.misses,
+                           cache_bytes=self.cache.size)
+
+        return metrics
+
+
+def describe(moves):
+    """the json form of the moves of one puzzle, as returned by solve_task, or of the error it failed with."""
+    if isinstance(moves, Exception):
+        return {'status': 'error', 'error': repr(moves)}
+
+    if moves == TIMED_OUT:
+        return {'status': 'timeout'}
+
+    if moves is None:
+        return {'status': 'unsolvable'}
+
+    return {'status': 'solved', 'length': len(moves), 'moves': [list(move) for move in moves]}
+
+
+def check_puzzle(cars, rows, columns):
+    """raises ValueError when a puzzle can not be searched: a bad board size, a bad car or an overlap."""
+    if not all(type(value) is int and value > 0 for value in (rows, columns)):
+        raise ValueError(f"the board size has to be two positive integers, not {rows!r} x {columns!r}")
+
+    if not cars:
+        raise ValueError("a puzzle needs at least the red car")
+
+    for car_idx, car in enumerate(cars):
+        if car.orientation not in ('h', 'v'):
+            raise ValueError(f"car {car_idx} has orientation {car.orientation!r}, expected 'h' or 'v'")
+        if not all(type(value) is int for value in (car.row, car.col, car.length)) or car.length < 1:
+            raise ValueError(f"car {car_idx} needs an integer cell and a positive integer length")
+
+    check_cars(cars, rows, columns)
+
+
+async def read_request(reader):
+    """reads an http request; returns its method, path, headers with lower case names and body."""
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise BadRequest("malformed request line")
+        method, target, version = request_line
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            raise BadRequest(f"the body is larger than {MAX_BODY} bytes", 413)
+
+        body = await reader.readexactly(length)
+
+    except (ValueError, asyncio.IncompleteReadError) as error:
+        raise BadRequest(f"malformed request: {error!r}")
+
+    return method, target.split('?')[0], headers, body
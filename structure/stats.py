@@ -0,0 +1,50 @@
+import json
+import time
+
+
+class SearchStats:
+    """
+    Counters and timers filled in by a search when it is given one.
+
+    expanded: states whose successors were generated
+    generated: successors created
+    duplicates: successors dropped because their state was already reached at a lower or equal depth
+    stale: open list entries popped after their state had been expanded at a lower or equal depth
+    peak_open / peak_visited: largest size of the open list and of the visited states
+    successor_time / heuristic_time / open_list_time: seconds spent generating successors (without
+    their heuristic), computing heuristics and pushing to or popping from the open list
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.peak_open = 0
+        self.peak_visited = 0
+        self.successor_time = 0.0
+        self.heuristic_time = 0.0
+        self.open_list_time = 0.0
+
+    def timed(self, heuristic):
+        """wraps a heuristic function so the time spent in it is added to heuristic_time."""
+        def timed_heuristic(state):
+            start = time.perf_counter()
+            value = heuristic(state)
+            self.heuristic_time += time.perf_counter() - start
+            return value
+
+        return timed_heuristic
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def to_json(self, **extra):
+        """returns the stats as one line of json, with the extra fields in front."""
+        return json.dumps({**extra, **self.as_dict()})
+
+    def __str__(self):
+        return (f"expanded={self.expanded} generated={self.generated} duplicates={self.duplicates} "
+                f"stale={self.stale} peak_open={self.peak_open} peak_visited={self.peak_visited} "
+                f"successor_time={self.successor_time:.4f}s heuristic_time={self.heuristic_time:.4f}s "
+                f"open_list_time={self.open_list_time:.4f}s")